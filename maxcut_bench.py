@@ -0,0 +1,153 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+from maxcut_single import (as_csr, create_sparse_weighted_graph, create_weighted_graph, local_search_maxcut,
+                           local_search_maxcut_to_optimum, multilevel_maxcut, multistart_maxcut,
+                           simulated_annealing_maxcut)
+
+SOLVERS = ('local', 'optimum', 'annealing', 'multistart', 'multilevel')
+
+
+def run_solver(solver, graph, seed, args):
+    # Runs one solver from the first half / second half partition. Returns (A, number of flips or None).
+    n = graph.number_of_nodes()
+    A = list(range(n // 2))
+    B = list(range(n // 2, n))
+    if solver == 'local':
+        A, B = local_search_maxcut(graph, A, B, seed)
+        return A, None
+    if solver == 'optimum':
+        A, B, info = local_search_maxcut_to_optimum(graph, A, B, seed)
+        return A, info['flips']
+    if solver == 'annealing':
+        # a fixed number of iterations keeps the run deterministic, a time budget only if asked for
+        A, B, info = simulated_annealing_maxcut(graph, A, B, seed, time_budget=args.time_budget,
+                                                max_iterations=args.annealing_iterations * n)
+        return A, info['flips']
+    if solver == 'multistart':
+        A, B, stats = multistart_maxcut(graph, args.restarts, workers=args.workers, seed=seed)
+        return A, sum(restart['flips'] for restart in stats)
+    A, B, info = multilevel_maxcut(graph, seed)
+    return A, sum(info['flips'])
+
+
+def run_case(n, p, max_weight, seed, args):
+    # All solvers on one graph. The cut values are also reported relative to the best cut any solver found,
+    # for reading; the regression check compares the absolute cut values of the deterministic runs.
+    start = time.perf_counter()
+    if n >= args.sparse_from:
+        graph = create_sparse_weighted_graph(n, p, max_weight, seed=seed)
+    else:
+        graph = as_csr(create_weighted_graph(n, p, max_weight, seed=seed))
+    setup_time = time.perf_counter() - start
+
+    records = []
+    for solver in args.solvers:
+        start = time.perf_counter()
+        A, flips = run_solver(solver, graph, seed, args)
+        wall_time = time.perf_counter() - start
+        record = {'n': n, 'p': p, 'max_weight': max_weight, 'seed': seed, 'm': graph.number_of_edges(),
+                  'solver': solver, 'setup_time': setup_time, 'wall_time': wall_time, 'flips': flips,
+                  'flips_per_second': flips / wall_time if flips is not None and wall_time > 0 else None,
+                  'cut_value': graph.cut_value(graph.membership(A)),
+                  'deterministic': solver != 'annealing' or args.time_budget is None}
+        if args.memory:
+            # separate run, tracemalloc slows down the solvers too much to time them at the same time
+            tracemalloc.start()
+            run_solver(solver, graph, seed, args)
+            record['peak_memory'] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        records.append(record)
+
+    best_cut_value = max(record['cut_value'] for record in records)
+    for record in records:
+        record['best_known'] = best_cut_value
+        record['relative_cut'] = record['cut_value'] / best_cut_value if best_cut_value else 1.0
+    return records
+
+
+def case_key(record):
+    return record['n'], record['p'], record['max_weight'], record['seed'], record['solver']
+
+
+def compare(records, baseline, time_tolerance, quality_tolerance):
+    # Regressions against a baseline run: slower by more than time_tolerance (relative), or a cut value lower
+    # by more than quality_tolerance (relative). Only deterministic runs have comparable cut values, the
+    # wall-clock-bounded annealing runs are checked for time alone. Cases missing from the baseline are ignored.
+    baseline_records = {case_key(record): record for record in baseline['records']}
+    regressions = []
+    for record in records:
+        old = baseline_records.get(case_key(record))
+        if old is None:
+            continue
+        if record['wall_time'] > old['wall_time'] * (1 + time_tolerance):
+            regressions.append(f'{case_key(record)}: wall_time {record["wall_time"]:.4f}s, '
+                               f'baseline {old["wall_time"]:.4f}s')
+        if record['deterministic'] and old.get('deterministic') and \
+                record['cut_value'] < old['cut_value'] * (1 - quality_tolerance):
+            regressions.append(f'{case_key(record)}: cut_value {record["cut_value"]}, '
+                               f'baseline {old["cut_value"]}')
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the maxcut solvers: time, flips/s, memory and quality.')
+    parser.add_argument('--n', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--p', type=float, nargs='+', default=[0.01, 0.1])
+    parser.add_argument('--max-weight', type=int, nargs='+', default=[10])
+    parser.add_argument('--seeds', type=int, nargs='+', default=[1, 2, 3])
+    parser.add_argument('--solvers', choices=SOLVERS, nargs='+', default=list(SOLVERS))
+    parser.add_argument('--annealing-iterations', type=int, default=100,
+                        help='iterations per node, for the annealing solver')
+    parser.add_argument('--time-budget', type=float, default=None,
+                        help='seconds, for the annealing solver; makes its cut values unfit for --compare')
+    parser.add_argument('--restarts', type=int, default=8, help='for the multistart solver')
+    parser.add_argument('--workers', type=int, default=1, help='for the multistart solver')
+    parser.add_argument('--sparse-from', type=int, default=5000,
+                        help='generate graphs with at least this many nodes with create_sparse_weighted_graph')
+    parser.add_argument('--max-edges', type=int, default=2000000, help='skip cases with more expected edges')
+    parser.add_argument('--no-memory', dest='memory', action='store_false', help='skip the peak memory runs')
+    parser.add_argument('--output', default=None, help='write the results as JSON to this file (default: stdout)')
+    parser.add_argument('--compare', default=None, help='JSON file of a baseline run to check for regressions')
+    parser.add_argument('--time-tolerance', type=float, default=0.25)
+    parser.add_argument('--quality-tolerance', type=float, default=0.01)
+    args = parser.parse_args(argv)
+
+    records = []
+    for n in args.n:
+        for p in args.p:
+            if p * n * (n - 1) / 2 > args.max_edges:
+                continue
+            for max_weight in args.max_weight:
+                for seed in args.seeds:
+                    case_records = run_case(n, p, max_weight, seed, args)
+                    for record in case_records:
+                        print(f'n:{n}, p:{p}, max_weight:{max_weight}, seed:{seed}, solver:{record["solver"]}, '
+                              f'time:{record["wall_time"]:.4f}s, relative_cut:{record["relative_cut"]:.4f}',
+                              file=sys.stderr)
+                    records.extend(case_records)
+
+    result = {'python': platform.python_version(), 'machine': platform.machine(), 'args': vars(args),
+              'records': records}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=1)
+    else:
+        print(json.dumps(result, indent=1))
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(records, baseline, args.time_tolerance, args.quality_tolerance)
+        for regression in regressions:
+            print(f'Regression: {regression}', file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import argparse
+import os
+import subprocess
+import sys
+
+from maxcut_single import (check_cut_value, create_sparse_weighted_graph, create_weighted_graph,
+                           local_search_maxcut, local_search_maxcut_to_optimum, multilevel_maxcut,
+                           multistart_maxcut, simulated_annealing_maxcut)
+
+SOLVERS = ('local', 'optimum', 'annealing', 'multistart', 'multilevel')
+
+
+def measure_import_time(module='maxcut_single'):
+    # Seconds to import module in a fresh interpreter, i.e. what every worker process pays at startup
+    code = f'import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)'
+    output = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+    return float(output)
+
+
+def run_solver(solver, G, A, B, args):
+    if solver == 'local':
+        A, B = local_search_maxcut(G, A, B, seed=args.search_seed)
+        return A, B, None
+    if solver == 'optimum':
+        return local_search_maxcut_to_optimum(G, A, B, seed=args.search_seed)
+    if solver == 'annealing':
+        return simulated_annealing_maxcut(G, A, B, seed=args.search_seed, time_budget=args.time_budget,
+                                          target=args.threshold)
+    if solver == 'multistart':
+        A, B, stats = multistart_maxcut(G, args.restarts, workers=args.workers, seed=args.search_seed)
+        return A, B, {'restarts': len(stats), 'best': max(stats, key=lambda restart: restart['cut_value'])}
+    return multilevel_maxcut(G, seed=args.search_seed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Local search for maximum cut on a random weighted graph.')
+    parser.add_argument('--n', type=int, default=12, help='number of nodes')
+    parser.add_argument('--p', type=float, default=0.7, help='edge probability')
+    parser.add_argument('--max-weight', type=int, default=10, help='edge weights are drawn from 1..max_weight')
+    parser.add_argument('--seed', type=int, default=12, help='seed of the graph')
+    parser.add_argument('--sparse', action='store_true',
+                        help='generate the graph with create_sparse_weighted_graph (O(n + m)) instead')
+    parser.add_argument('--solver', choices=SOLVERS, default='local')
+    parser.add_argument('--search-seed', type=int, default=123, help='seed of the solver')
+    parser.add_argument('--time-budget', type=float, default=0.2, help='seconds, for --solver annealing')
+    parser.add_argument('--restarts', type=int, default=8, help='for --solver multistart')
+    parser.add_argument('--workers', type=int, default=None, help='for --solver multistart (default: all cores)')
+    parser.add_argument('--threshold', type=int, default=199, help='minimum cut value to pass the check')
+    parser.add_argument('--output', default=None, help='save a drawing of the graph to this image file')
+    parser.add_argument('--import-budget', type=float, default=None,
+                        help='only measure the import time of maxcut_single and fail if it exceeds this many seconds')
+    args = parser.parse_args(argv)
+
+    if args.import_budget is not None:
+        import_time = measure_import_time()
+        print(f'Import time of maxcut_single: {import_time:.3f}s (budget {args.import_budget:.3f}s)')
+        if import_time > args.import_budget:
+            sys.exit(1)
+        return
+
+    if args.sparse:
+        G = create_sparse_weighted_graph(args.n, args.p, args.max_weight, seed=args.seed)
+    else:
+        G = create_weighted_graph(args.n, args.p, args.max_weight, seed=args.seed)
+
+    if args.output:
+        import matplotlib.pyplot as plt
+        import networkx as nx
+        nx.draw(G.to_networkx() if args.sparse else G, with_labels=True)
+        plt.savefig(args.output)
+
+    # Create a partition (partition_A, partition_B): first half and second half of the nodes
+    nodes = list(range(args.n))
+    partition_A = nodes[0:args.n // 2]
+    partition_B = nodes[args.n // 2:args.n]
+
+    A, B, info = run_solver(args.solver, G, partition_A, partition_B, args)
+    print(A)
+    print(B)
+    if info is not None:
+        print(info)
+
+    # Check the value
+    print(check_cut_value(G, A, B, args.threshold))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,18 @@
-import networkx as nx
-import matplotlib.pyplot as plt
+import concurrent.futures
+import heapq
+import itertools
+import math
+import os
 import random
+import time
+
+import numpy as np
+
+# networkx and matplotlib are imported inside the functions that need them, to keep this module cheap to
+# import (e.g. in every worker process). The demo lives in maxcut_cli.py.
 
 def create_weighted_graph(n, p, max_weight = 10, seed=None):
+    import networkx as nx
     G = nx.gnp_random_graph(n, p, seed=seed, directed=False)
 
     rng = random.Random(seed)
@@ -11,84 +21,742 @@ def create_weighted_graph(n, p, max_weight = 10, seed=None):
 
     return G
 
+
+class CSRGraph:
+    # Compact adjacency (compressed sparse row) form of an undirected weighted graph.
+    # Every edge is stored in both directions, the neighbors of node i are indices[indptr[i]:indptr[i + 1]].
+    indptr: np.ndarray  # offsets into indices/weights, length n + 1
+    indices: np.ndarray  # neighbor indices (int32)
+    weights: np.ndarray  # edge weights aligned with indices
+    nodes: list  # node labels of the indices, or None when the labels are 0..n-1
+
+    # constructor
+    def __init__(self, indptr, indices, weights, nodes=None):
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self.nodes = nodes
+        self.index = None if nodes is None else {v: i for i, v in enumerate(nodes)}
+
+    def __repr__(self):
+        return "CSRGraph()"
+
+    def __str__(self):
+        return f"CSRGraph(n:{self.number_of_nodes()}, m:{self.number_of_edges()})"
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    @classmethod
+    def from_networkx(cls, G, weight='weight'):
+        nodes = list(G.nodes)
+        index = {v: i for i, v in enumerate(nodes)}
+        indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+        indices = []
+        weights = []
+        for i, v in enumerate(nodes):
+            # self-loops never cross a cut
+            for u, attributes in G.adj[v].items():
+                if u != v:
+                    indices.append(index[u])
+                    weights.append(attributes[weight])
+            indptr[i + 1] = len(indices)
+        if nodes == list(range(len(nodes))):
+            nodes = None
+        return cls(indptr, np.asarray(indices, dtype=np.int32), np.asarray(weights), nodes)
+
+    @classmethod
+    def from_arrays(cls, u, v, w, n=None):
+        # u, v: endpoint arrays with labels 0..n-1, w: weights. Parallel edges are merged by
+        # summing their weights and self-loops are dropped, neither changes any cut value.
+        u = np.asarray(u, dtype=np.int64)
+        v = np.asarray(v, dtype=np.int64)
+        w = np.asarray(w)
+        if n is None:
+            n = int(max(u.max(initial=-1), v.max(initial=-1))) + 1
+        keep = u != v
+        src = np.concatenate((u[keep], v[keep]))
+        dst = np.concatenate((v[keep], u[keep]))
+        w = np.concatenate((w[keep], w[keep]))
+
+        order = np.argsort(src * n + dst)
+        src, dst, w = src[order], dst[order], w[order]
+        if len(src) > 0:
+            first = np.ones(len(src), dtype=bool)
+            first[1:] = (src[1:] != src[:-1]) | (dst[1:] != dst[:-1])
+            starts = np.flatnonzero(first)
+            w = np.add.reduceat(w, starts)
+            src, dst = src[starts], dst[starts]
+
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+        return cls(indptr, dst.astype(np.int32), w)
+
+    @classmethod
+    def from_edge_list(cls, edges, n=None):
+        # edges: iterable of (u, v, weight) with node labels 0..n-1
+        edges = list(edges)
+        u, v, w = zip(*edges) if edges else ((), (), ())
+        return cls.from_arrays(u, v, w, n)
+
+    def to_networkx(self):
+        import networkx as nx
+        G = nx.Graph()
+        G.add_nodes_from(self.label_of(i) for i in range(self.number_of_nodes()))
+        u, v, w = self.edges()
+        G.add_weighted_edges_from(zip(map(self.label_of, u.tolist()), map(self.label_of, v.tolist()), w.tolist()))
+        return G
+
+    def save(self, directory):
+        # one .npy file per array, so that load can memory-map them
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, 'indptr.npy'), self.indptr)
+        np.save(os.path.join(directory, 'indices.npy'), self.indices)
+        np.save(os.path.join(directory, 'weights.npy'), self.weights)
+        if self.nodes is not None:
+            np.save(os.path.join(directory, 'nodes.npy'), np.asarray(self.nodes))
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        indptr = np.load(os.path.join(directory, 'indptr.npy'), mmap_mode=mmap_mode)
+        indices = np.load(os.path.join(directory, 'indices.npy'), mmap_mode=mmap_mode)
+        weights = np.load(os.path.join(directory, 'weights.npy'), mmap_mode=mmap_mode)
+        nodes = None
+        if os.path.exists(os.path.join(directory, 'nodes.npy')):
+            nodes = np.load(os.path.join(directory, 'nodes.npy')).tolist()
+        return cls(indptr, indices, weights, nodes)
+
+    def number_of_nodes(self):
+        return len(self.indptr) - 1
+
+    def number_of_edges(self):
+        return len(self.indices) // 2
+
+    def index_of(self, v):
+        return v if self.index is None else self.index[v]
+
+    def label_of(self, i):
+        return i if self.nodes is None else self.nodes[i]
+
+    def neighbors(self, i):
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def neighbor_weights(self, i):
+        return self.weights[self.indptr[i]:self.indptr[i + 1]]
+
+    def rows(self):
+        # source index of every stored edge entry, aligned with indices
+        return np.repeat(np.arange(self.number_of_nodes(), dtype=np.int32), np.diff(self.indptr))
+
+    def edges(self):
+        # every edge once, as (u, v, weight) arrays with u < v
+        rows = self.rows()
+        upper = rows < self.indices
+        return rows[upper], self.indices[upper], self.weights[upper]
+
+    def weighted_degrees(self):
+        return np.bincount(self.rows(), weights=self.weights, minlength=self.number_of_nodes())
+
+    def membership(self, S):
+        mask = np.zeros(self.number_of_nodes(), dtype=bool)
+        mask[[self.index_of(v) for v in S]] = True
+        return mask
+
+    def cut_value(self, side):
+        # side: array with one entry per node, the cut is the weight of edges whose endpoints differ
+        crossing = side[self.rows()] != side[self.indices]
+        total = self.weights[crossing].sum().item()
+        return total // 2 if self.weights.dtype.kind in 'iu' else total / 2
+
+
+def as_csr(G):
+    return G if isinstance(G, CSRGraph) else CSRGraph.from_networkx(G)
+
+
+def create_sparse_weighted_graph(n, p, max_weight=10, seed=None):
+    # G(n,p) in O(n + m) by geometric skipping (Batagelj & Brandes) over the n(n-1)/2 node pairs,
+    # with all weights drawn in bulk. Returns a CSRGraph. The graph for a seed is reproducible,
+    # but it is a different sample than create_weighted_graph for the same seed.
+    rng = np.random.default_rng(seed)
+    num_of_pairs = n * (n - 1) // 2
+    if p <= 0 or num_of_pairs == 0:
+        positions = np.zeros(0, dtype=np.int64)
+    elif p >= 1:
+        positions = np.arange(num_of_pairs, dtype=np.int64)
+    else:
+        chunks = []
+        last = -1
+        batch = int(p * num_of_pairs + 5 * math.sqrt(p * num_of_pairs) + 16)
+        while last < num_of_pairs:
+            # distance to the next present pair is geometric with success probability p
+            chunk = last + np.cumsum(rng.geometric(p, size=batch))
+            last = int(chunk[-1])
+            chunks.append(chunk[chunk < num_of_pairs])
+            batch = max(16, batch // 4)
+        positions = np.concatenate(chunks)
+
+    # position k of the pair (v, u) with u < v is v(v-1)/2 + u
+    v = ((1 + np.sqrt(1 + 8 * positions.astype(np.float64))) / 2).astype(np.int64)
+    v -= v * (v - 1) // 2 > positions
+    v += (v + 1) * v // 2 <= positions
+    u = positions - v * (v - 1) // 2
+    w = rng.integers(1, max_weight + 1, size=len(positions))
+    return CSRGraph.from_arrays(u, v, w, n)
+
+
+def load_edge_list(path, n=None, default_weight=1, relabel=False, chunk_lines=1000000):
+    # Stream a text edge list ("u v [weight]" per line, '#' comments) into a CSRGraph, chunk_lines lines
+    # at a time, without building a networkx graph. Node ids must be integers 0..n-1 unless relabel is set,
+    # in which case the sorted distinct ids become the node labels.
+    us = []
+    vs = []
+    ws = []
+    with open(path) as f:
+        while True:
+            lines = list(itertools.islice(f, chunk_lines))
+            if not lines:
+                break
+            lines = [line for line in lines if line.strip() and not line.lstrip().startswith('#')]
+            if not lines:
+                continue
+            data = np.loadtxt(lines, ndmin=2)
+            us.append(data[:, 0].astype(np.int64))
+            vs.append(data[:, 1].astype(np.int64))
+            ws.append(data[:, 2] if data.shape[1] > 2 else np.full(len(data), default_weight, dtype=np.float64))
+
+    u = np.concatenate(us) if us else np.zeros(0, dtype=np.int64)
+    v = np.concatenate(vs) if vs else np.zeros(0, dtype=np.int64)
+    w = np.concatenate(ws) if ws else np.zeros(0)
+    if np.all(w == np.round(w)):
+        w = w.astype(np.int64)
+
+    if not relabel:
+        return CSRGraph.from_arrays(u, v, w, n)
+    labels, inverse = np.unique(np.concatenate((u, v)), return_inverse=True)
+    graph = CSRGraph.from_arrays(inverse[:len(u)], inverse[len(u):], w, len(labels))
+    return CSRGraph(graph.indptr, graph.indices, graph.weights, labels.tolist())
+
+
 def total_weight_of_sides(G, v, A, B):
+    if isinstance(G, CSRGraph):
+        i = G.index_of(v)
+        neighbors = G.neighbors(i)
+        weights = G.neighbor_weights(i)
+        sum_A = weights[G.membership(A)[neighbors]].sum().item()
+        sum_B = weights[G.membership(B)[neighbors]].sum().item()
+        if v in A:
+            return sum_A, sum_B
+        return sum_B, sum_A
+
     sum_A = 0
     sum_B = 0
-    is_A = False
-
-    edge_attributes = nx.get_edge_attributes(G,"weight")
-    for node in nx.all_neighbors(G,v):
-        for a in A:
-            if (a == v):
-                is_A = True;
-            if node == a:
-                if (v,node) in edge_attributes:
-                    sum_A += edge_attributes[(v,node)]
-                else:
-                    sum_A += edge_attributes[(node,v)]
-        for b in B:
-            if node == b:
-                if (v,node) in edge_attributes:
-                    sum_B += edge_attributes[(v,node)]
-                else:
-                    sum_B += edge_attributes[(node,v)]
-        
-                
-    if is_A: 
-        sum_own_side = sum_A 
+    is_A = v in A
+
+    set_A = set(A)
+    set_B = set(B)
+    for node, attributes in G.adj[v].items():
+        if node in set_A:
+            sum_A += attributes['weight']
+        elif node in set_B:
+            sum_B += attributes['weight']
+
+    if is_A:
+        sum_own_side = sum_A
         sum_other_side = sum_B
     else:
         sum_own_side = sum_B
         sum_other_side = sum_A
-        
+
     return sum_own_side, sum_other_side
 
 
+class GainTable:
+    graph: CSRGraph  # adjacency of the graph
+    side: np.ndarray  # side[i] is 0 if node i is in A, 1 if it is in B
+    gain: np.ndarray  # gain[i] = weight to own side - weight to other side
+    members: tuple  # (A, B) as dicts used as ordered sets
+
+    # constructor
+    def __init__(self, G, A, B):
+        self.graph = as_csr(G)
+
+        # nodes that are in neither A nor B are treated as members of B (same as total_weight_of_sides)
+        self.side = np.ones(self.graph.number_of_nodes(), dtype=np.int8)
+        self.side[self.graph.membership(A)] = 0
+        # a flipped node moves to the end of its new side, like list.remove followed by list.append
+        self.members = (dict.fromkeys(A), dict.fromkeys(B))
+
+        rows = self.graph.rows()
+        contribution = np.where(self.side[rows] == self.side[self.graph.indices], self.graph.weights,
+                                -self.graph.weights)
+        gain = np.bincount(rows, weights=contribution, minlength=self.graph.number_of_nodes())
+        self.gain = gain.astype(self.graph.weights.dtype) if self.has_integer_weights() else gain
+
+    def __repr__(self):
+        return "GainTable()"
+
+    def neighbors(self, i):
+        return self.graph.neighbors(i)
+
+    def flip(self, i):
+        # Move node i to the other side and update the gains of its neighbors in O(deg)
+        neighbors = self.graph.neighbors(i)
+        weights = self.graph.neighbor_weights(i)
+        side_i = self.side[i]
+        self.gain[neighbors] += np.where(self.side[neighbors] == side_i, -2 * weights, 2 * weights)
+        self.side[i] = 1 - side_i
+        self.gain[i] = -self.gain[i]
+
+        v = self.graph.label_of(i)
+        self.members[side_i].pop(v, None)
+        self.members[1 - side_i][v] = None
+
+    def max_weighted_degree(self):
+        # bound of the absolute gains, weights may be negative (coarsened graphs)
+        rows = self.graph.rows()
+        degrees = np.bincount(rows, weights=np.abs(self.graph.weights), minlength=self.graph.number_of_nodes())
+        return int(degrees.max(initial=0))
+
+    def has_integer_weights(self):
+        return self.graph.weights.dtype.kind in 'iu'
+
+    def cut_value(self):
+        return self.graph.cut_value(self.side)
+
+    def partitions(self):
+        return list(self.members[0]), list(self.members[1])
+
+
+class GainBuckets:
+    # Fiduccia-Mattheyses gain buckets for integer gains. Only nodes with positive gain are kept.
+    buckets: list  # buckets[g] holds the nodes with gain g (dict used as a FIFO ordered set)
+    gain_of: dict  # node index -> gain under which it is stored
+    max_gain: int  # upper bound of the highest non-empty bucket
+
+    # constructor
+    def __init__(self, max_gain):
+        self.buckets = [dict() for _ in range(max_gain + 1)]
+        self.gain_of = dict()
+        self.max_gain = 0
+
+    def __repr__(self):
+        return "GainBuckets()"
+
+    def __len__(self):
+        return len(self.gain_of)
+
+    def update(self, i, gain):
+        old_gain = self.gain_of.pop(i, None)
+        if old_gain is not None:
+            del self.buckets[old_gain][i]
+        if gain > 0:
+            self.buckets[gain][i] = None
+            self.gain_of[i] = gain
+            if gain > self.max_gain:
+                self.max_gain = gain
+
+    def pop(self):
+        while self.max_gain > 0 and not self.buckets[self.max_gain]:
+            self.max_gain -= 1
+        if self.max_gain == 0:
+            return None
+        bucket = self.buckets[self.max_gain]
+        i = next(iter(bucket))
+        del bucket[i]
+        del self.gain_of[i]
+        return i
+
+
+class GainHeap:
+    # Lazy max-heap of nodes with positive gain, used when the weights are not integers
+    heap: list  # entries (-gain, insertion counter, node index), stale entries are skipped on pop
+    gain_of: dict  # node index -> current gain
+
+    # constructor
+    def __init__(self):
+        self.heap = []
+        self.gain_of = dict()
+        self.counter = 0
+
+    def __repr__(self):
+        return "GainHeap()"
+
+    def __len__(self):
+        return len(self.gain_of)
+
+    def update(self, i, gain):
+        if gain > 0:
+            self.gain_of[i] = gain
+            heapq.heappush(self.heap, (-gain, self.counter, i))
+            self.counter += 1
+        else:
+            self.gain_of.pop(i, None)
+
+    def pop(self):
+        while self.heap:
+            gain, _, i = heapq.heappop(self.heap)
+            if self.gain_of.get(i) == -gain:
+                del self.gain_of[i]
+                return i
+        return None
+
+
 def local_search_maxcut(G, A, B, seed):
     # Random Number Generator
     rng = random.Random(seed)
     # Use this random number generator if necessary.
     # For example rng.randint(0, 10) for a uniformly random integer r: 0 <= r <= 10
 
-    random_node_list = [rng.randint(0,len(G.nodes)-1),rng.randint(0,len(G.nodes)-1),rng.randint(0,len(G.nodes)-1),rng.randint(0,len(G.nodes)-1)]
+    random_node_list = [rng.randint(0,len(G)-1),rng.randint(0,len(G)-1),rng.randint(0,len(G)-1),rng.randint(0,len(G)-1)]
     #random_node = max(G.degree(weight='weight'))[0]
-    
-    import itertools
+
+    table = GainTable(G, A, B)
+
     for random_node in random_node_list:
-        for v in itertools.chain([random_node],nx.all_neighbors(G,random_node)):
-                is_A = True if v in A else False
-                this_side, other_side = total_weight_of_sides(G, v, A, B)
-
-                if (this_side > other_side):
-                    if(is_A):
-                        A.remove(v)
-                        B.append(v)
-                    else:
-                        B.remove(v)
-                        A.append(v)
-    
+        i = table.graph.index_of(random_node)
+        for j in itertools.chain([i], table.neighbors(i).tolist()):
+                if table.gain[j] > 0:
+                    table.flip(j)
+
+    A[:], B[:] = table.partitions()
     return A, B
 
+
+def local_search_maxcut_to_optimum(G, A, B, seed=None):
+    # Flip the node with the largest positive gain until no improving move is left.
+    # Returns the partitions and a dict with the number of flips.
+    # The scheduler is filled once and receives every gain change of a flip, so when it runs empty no node
+    # has a positive gain left: the partition is a local optimum.
+    rng = random.Random(seed)
+    table = GainTable(G, A, B)
+
+    # random order of the initial sweep, so that ties between equal gains depend on the seed
+    order = list(range(table.graph.number_of_nodes()))
+    rng.shuffle(order)
+
+    # one bucket per possible gain value, unless summed weights (e.g. of a coarsened graph) make that too many
+    max_gain = table.max_weighted_degree()
+    if table.has_integer_weights() and max_gain <= 4 * len(order) + 1024:
+        queue = GainBuckets(max_gain)
+    else:
+        queue = GainHeap()
+    gains = table.gain.tolist()
+    for i in order:
+        if gains[i] > 0:
+            queue.update(i, gains[i])
+
+    flips = 0
+    i = queue.pop()
+    while i is not None:
+        table.flip(i)
+        flips += 1
+        neighbors = table.neighbors(i)
+        for j, gain in zip(neighbors.tolist(), table.gain[neighbors].tolist()):
+            queue.update(j, gain)
+        i = queue.pop()
+
+    A[:], B[:] = table.partitions()
+    return A, B, {'flips': flips}
+
+
+def simulated_annealing_maxcut(G, A, B, seed, time_budget=None, max_iterations=None, target=None, callback=None,
+                               initial_temperature=None, final_temperature=None):
+    # Anytime simulated annealing on the incremental flip gains: every iteration proposes to flip one random
+    # node and costs O(deg) when the flip is accepted. The temperature cools geometrically over the budget
+    # (time_budget in seconds and/or max_iterations; 100 * n iterations if neither is given).
+    # Stops early once the best cut reaches `target` or when `callback` returns True. The callback receives
+    # a dict with the progress and the best cut value so far every `check_interval` iterations.
+    # Returns the best partitions found and a dict with iterations, flips, cut_value and time. The time budget
+    # and the time include the setup (GainTable, CSR conversion) and building the partitions.
+    start = time.perf_counter()
+    check_interval = 1024
+    rng = random.Random(seed)
+    table = GainTable(G, A, B)
+    n = table.graph.number_of_nodes()
+    if time_budget is None and max_iterations is None:
+        max_iterations = 100 * n
+
+    if initial_temperature is None:
+        # accept a typical worsening move with probability 1/2 at the start
+        sample = [abs(table.gain[rng.randrange(n)].item()) for _ in range(min(n, 100))] if n else []
+        typical = sorted(sample)[len(sample) // 2] if sample else 0
+        initial_temperature = max(typical, 1) / math.log(2)
+    if final_temperature is None:
+        final_temperature = initial_temperature * 1e-3
+    cooling = math.log(final_temperature / initial_temperature)
+
+    cut_value = table.cut_value()
+    best_cut_value = cut_value
+    # the best state is the current one with the journal flips undone, or best_side once the journal got long
+    journal = []
+    best_side = None
+
+    temperature = initial_temperature
+    iteration = 0
+    flips = 0
+    while n > 0 and (max_iterations is None or iteration < max_iterations):
+        if iteration % check_interval == 0:
+            elapsed = time.perf_counter() - start
+            fraction = 0.0
+            if time_budget is not None:
+                fraction = max(fraction, elapsed / time_budget) if time_budget > 0 else 1.0
+            if max_iterations is not None:
+                fraction = max(fraction, iteration / max_iterations) if max_iterations > 0 else 1.0
+            if callback is not None and callback({'iteration': iteration, 'elapsed': elapsed,
+                                                  'temperature': temperature, 'cut_value': cut_value,
+                                                  'best_cut_value': best_cut_value}):
+                break
+            if fraction >= 1.0 or (target is not None and best_cut_value >= target):
+                break
+            temperature = initial_temperature * math.exp(cooling * fraction)
+
+        i = rng.randrange(n)
+        delta = table.gain[i].item()
+        if delta >= 0 or rng.random() < math.exp(delta / temperature):
+            table.flip(i)
+            flips += 1
+            cut_value += delta
+            if cut_value > best_cut_value:
+                best_cut_value = cut_value
+                journal.clear()
+                best_side = None
+            elif best_side is None:
+                journal.append(i)
+                if len(journal) > n:
+                    best_side = table.side ^ (np.bincount(journal, minlength=n) & 1).astype(np.int8)
+                    journal.clear()
+        iteration += 1
+
+    if best_side is None:
+        best_side = table.side ^ (np.bincount(journal, minlength=n) & 1).astype(np.int8)
+    A[:] = [table.graph.label_of(i) for i in np.flatnonzero(best_side == 0).tolist()]
+    B[:] = [table.graph.label_of(i) for i in np.flatnonzero(best_side == 1).tolist()]
+    return A, B, {'iterations': iteration, 'flips': flips, 'cut_value': best_cut_value,
+                  'time': time.perf_counter() - start}
+
+
+# graph of a multistart worker process, set once by the pool initializer
+_worker_graph = None
+
+
+def _init_multistart_worker(graph):
+    global _worker_graph
+    _worker_graph = graph
+
+
+def _run_restart(restart, restart_seed):
+    graph = _worker_graph
+    rng = random.Random(restart_seed)
+    A = []
+    B = []
+    for i in range(graph.number_of_nodes()):
+        if rng.random() < 0.5:
+            A.append(graph.label_of(i))
+        else:
+            B.append(graph.label_of(i))
+
+    start = time.perf_counter()
+    A, B, info = local_search_maxcut_to_optimum(graph, A, B, restart_seed)
+    stats = {'restart': restart, 'seed': restart_seed,
+             'cut_value': graph.cut_value(graph.membership(A)),
+             'flips': info['flips'],
+             'time': time.perf_counter() - start}
+    return A, B, stats
+
+
+def _collect_restarts(results):
+    # keep only the best partitions while the results stream in, in restart order
+    best = None
+    stats = []
+    for A, B, restart_stats in results:
+        stats.append(restart_stats)
+        if best is None or restart_stats['cut_value'] > best[2]['cut_value']:
+            best = (A, B, restart_stats)
+    return best, stats
+
+
+def multistart_maxcut(G, restarts, workers=None, seed=None):
+    # Run local_search_maxcut_to_optimum from `restarts` random partitions on `workers` processes.
+    # The seed of every restart is drawn from `seed` up front, so the result does not depend on `workers`.
+    # Returns the best partitions (the first restart wins ties) and the statistics of every restart.
+    global _worker_graph
+    graph = as_csr(G)
+    rng = random.Random(seed)
+    restart_seeds = [rng.randint(0, 2 ** 32 - 1) for _ in range(restarts)]
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1:
+        _worker_graph = graph
+        try:
+            best, stats = _collect_restarts(itertools.starmap(_run_restart, enumerate(restart_seeds)))
+        finally:
+            _worker_graph = None
+    else:
+        # the graph is sent to every worker once through the initializer, not with every task
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_multistart_worker,
+                                                    initargs=(graph,)) as executor:
+            chunksize = max(1, restarts // (4 * workers))
+            best, stats = _collect_restarts(executor.map(_run_restart, range(restarts), restart_seeds,
+                                                         chunksize=chunksize))
+
+    if best is None:
+        return [], [], stats
+    return best[0], best[1], stats
+
+
+def heavy_edge_matching(graph, seed=None, rounds=20):
+    # Handshake heavy-edge matching: in every round each unmatched node proposes to its unmatched neighbor with
+    # the largest absolute edge weight and mutual proposals are matched. Every round is a few vectorized
+    # passes over the edge entries of unmatched nodes. Returns mate[i], the node matched with i, or -1.
+    rng = np.random.default_rng(seed)
+    n = graph.number_of_nodes()
+    rows = graph.rows()
+    cols = graph.indices
+    key = np.abs(graph.weights).astype(np.float64)
+    if graph.weights.dtype.kind in 'iu':
+        # ties between equal integer weights are broken at random
+        key += rng.random(len(key)) * 0.5
+    mate = np.full(n, -1, dtype=np.int64)
+    for _ in range(rounds):
+        free = (mate[rows] < 0) & (mate[cols] < 0)
+        rows, cols, key = rows[free], cols[free], key[free]
+        if len(rows) == 0:
+            break
+        # the entries are grouped by row, the heaviest entry of every row is its proposal
+        first = np.ones(len(rows), dtype=bool)
+        first[1:] = rows[1:] != rows[:-1]
+        starts = np.flatnonzero(first)
+        heaviest = np.repeat(np.maximum.reduceat(key, starts), np.diff(np.append(starts, len(rows))))
+        best = key == heaviest
+        proposal = np.full(n, -1, dtype=np.int64)
+        proposal[rows[best]] = cols[best]
+
+        proposing = np.flatnonzero(proposal >= 0)
+        mutual = proposing[proposal[proposal[proposing]] == proposing]
+        if len(mutual) == 0:
+            break
+        mate[mutual] = proposal[mutual]
+    return mate
+
+
+def coarsen(graph, seed=None):
+    # Contract a heavy-edge matching for max-cut. The two nodes of a pair go to opposite sides if their edge
+    # has positive weight, so that it is cut, and to the same side if it is negative.
+    # Returns the coarse graph, coarse_of[i], the coarse node of node i, and flip[i]: node i is on the side of
+    # its coarse node if flip[i] is 0 and on the other side if it is 1.
+    # An edge between nodes with equal flip keeps its weight, the other edges are cut exactly when their coarse
+    # edge is not, so their weight is negated (the coarse weights are signed). The cut of a partition of
+    # the coarse graph differs from the cut of its projection by a constant, so both have the same optima.
+    mate = heavy_edge_matching(graph, seed)
+    nodes = np.arange(graph.number_of_nodes())
+    representative = np.where(mate >= 0, np.minimum(nodes, mate), nodes)
+    # coarse nodes are numbered in the order of their representatives
+    coarse_of = (np.cumsum(representative == nodes) - 1)[representative]
+
+    u, v, w = graph.edges()
+    flip = np.zeros(graph.number_of_nodes(), dtype=np.int8)
+    flip[v[(mate[u] == v) & (w > 0)]] = 1
+    w = np.where(flip[u] == flip[v], w, -w)
+    coarse = CSRGraph.from_arrays(coarse_of[u], coarse_of[v], w, n=int(coarse_of.max(initial=-1)) + 1)
+    return coarse, coarse_of, flip
+
+
+def multilevel_maxcut(G, seed=None, coarsest_size=256, coarse_restarts=8):
+    # Coarsen by heavy-edge matching until at most coarsest_size nodes are left (or matching stalls),
+    # solve the coarsest graph with multistart_maxcut, then project the partition back level by level and
+    # refine it with local_search_maxcut_to_optimum. Every level is linear in its number of edges.
+    # Returns the partitions and a dict with the node count of every level, the flips per level and cut_value.
+    rng = random.Random(seed)
+    graph = as_csr(G)
+    levels = [graph]
+    maps = []
+    while levels[-1].number_of_nodes() > coarsest_size:
+        coarse, coarse_of, flip = coarsen(levels[-1], rng.randint(0, 2 ** 32 - 1))
+        if coarse.number_of_nodes() > 0.95 * levels[-1].number_of_nodes():
+            break
+        levels.append(coarse)
+        maps.append((coarse_of, flip))
+
+    A, B, _ = multistart_maxcut(levels[-1], coarse_restarts, workers=1, seed=rng.randint(0, 2 ** 32 - 1))
+    side = np.ones(levels[-1].number_of_nodes(), dtype=np.int8)
+    side[levels[-1].membership(A)] = 0
+
+    flips = []
+    for level in range(len(maps) - 1, -1, -1):
+        fine = levels[level]
+        coarse_of, flip = maps[level]
+        side = side[coarse_of] ^ flip
+        A = [fine.label_of(i) for i in np.flatnonzero(side == 0).tolist()]
+        B = [fine.label_of(i) for i in np.flatnonzero(side == 1).tolist()]
+        A, B, info = local_search_maxcut_to_optimum(fine, A, B, rng.randint(0, 2 ** 32 - 1))
+        flips.append(info['flips'])
+        side = np.ones(fine.number_of_nodes(), dtype=np.int8)
+        side[fine.membership(A)] = 0
+
+    return A, B, {'levels': [level.number_of_nodes() for level in levels], 'flips': flips,
+                  'cut_value': graph.cut_value(side)}
+
+
 def check_cut_value(G, A, B, threshold):
-    cut_value = nx.algorithms.cut_size(G, A, weight='weight')
+    if isinstance(G, CSRGraph):
+        cut_value = G.cut_value(G.membership(A))
+    else:
+        import networkx as nx
+        cut_value = nx.algorithms.cut_size(G, A, weight='weight')
     if cut_value >= threshold:
         return str(True)
     else:
         return f'The cut_value is {cut_value} but should be at least {threshold}.'
 
-G = create_weighted_graph(12, 0.7, seed=12)
-nx.draw(G,with_labels=True);
-plt.savefig("A");
 
-# Create a random partition (partition_A, partition_B)
-nodes = list(G.nodes)
-partition_A = nodes[0:6]
-partition_B = nodes[6:12]
+def side_matrix(G, partitions):
+    # One row per partition A (or (A, B) pair): 0 for the nodes of A, 1 for all others
+    graph = as_csr(G)
+    sides = np.ones((len(partitions), graph.number_of_nodes()), dtype=np.int8)
+    for row, partition in enumerate(partitions):
+        A = partition[0] if isinstance(partition, tuple) else partition
+        sides[row, graph.membership(A)] = 0
+    return sides
+
+
+def batch_cut_values(G, sides, packed=False, max_block=1 << 24):
+    # Cut values of many partitions in one vectorized pass over the edge arrays.
+    # sides: (k, n) matrix of side assignments, or with packed=True a (k, ceil(n / 8)) uint8 matrix as
+    # produced by np.packbits(sides, axis=1). Edges are processed in blocks of about max_block entries.
+    graph = as_csr(G)
+    u, v, w = graph.edges()
+    # node-major copy, so that looking up the endpoints of an edge block gathers contiguous rows
+    by_node = np.ascontiguousarray(np.asarray(sides).T)
+    k = by_node.shape[1]
+    integer_weights = w.dtype.kind in 'iu'
+    # float64 matrix products are exact for integer cut values below 2**53
+    cut_values = np.zeros(k, dtype=np.float64)
+    block = max(1, max_block // max(k, 1))
+    for start in range(0, len(w), block):
+        bu, bv = u[start:start + block], v[start:start + block]
+        if packed:
+            side_u = (by_node[bu >> 3] >> (7 - (bu & 7)).astype(np.uint8)[:, None]) & 1
+            side_v = (by_node[bv >> 3] >> (7 - (bv & 7)).astype(np.uint8)[:, None]) & 1
+        else:
+            side_u = by_node[bu]
+            side_v = by_node[bv]
+        cut_values += w[start:start + block].astype(np.float64) @ (side_u != side_v)
+    if integer_weights:
+        cut_values = cut_values.astype(np.int64)
+    return cut_values
+
 
-# Run local search
-A, B = local_search_maxcut(G, partition_A, partition_B, seed=123)
-print(A)
-print(B)
+def batch_check_cut_values(G, sides, threshold, packed=False):
+    # check_cut_value for every row of sides
+    results = []
+    for cut_value in batch_cut_values(G, sides, packed).tolist():
+        if cut_value >= threshold:
+            results.append(str(True))
+        else:
+            results.append(f'The cut_value is {cut_value} but should be at least {threshold}.')
+    return results
 
-# Check the value
-print(check_cut_value(G, A, B, 199))
+if __name__ == "__main__":
+    from maxcut_cli import main
+    main(['--output', 'A.png'])
@@ -0,0 +1,181 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import networkx as nx
+
+from moran_game_single import GRAPH_CACHE, Parameters, create_game_setup, run_moran_game, run_moran_replicas
+
+ENGINES = ('naive', 'event', 'replicas')
+
+
+def parameters(n, m, num_of_players, steps, seed, engine):
+    return Parameters(num_of_players=num_of_players, n=n, m=m, steps=steps, seed=seed,
+                      assignment=list(range(num_of_players)), interactive=False,
+                      engine='naive' if engine == 'replicas' else engine)
+
+
+def measure_setup(p, repeat=3):
+    # Seconds for the graph alone, the whole uncached setup (graph and initial assignment) and the setup with
+    # the graph in GRAPH_CACHE, the best of repeat runs each. The graph seed is the first number of the game's
+    # generator (create_game_setup).
+    graph_seed = random.Random(p.seed).randint(0, 10000000)
+    graph_time = setup_time = cached_setup_time = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        nx.barabasi_albert_graph(p.n, p.m, graph_seed)
+        graph_time = min(graph_time, time.perf_counter() - start)
+
+        p.graph_cache = False
+        start = time.perf_counter()
+        create_game_setup(p)
+        setup_time = min(setup_time, time.perf_counter() - start)
+
+        p.graph_cache = True
+        create_game_setup(p)
+        start = time.perf_counter()
+        create_game_setup(p)
+        cached_setup_time = min(cached_setup_time, time.perf_counter() - start)
+    return {'graph_time': graph_time, 'setup_time': setup_time,
+            'assignment_time': max(0.0, setup_time - graph_time), 'cached_setup_time': cached_setup_time}
+
+
+def run_engine(p, engine, args):
+    # Plays the game(s) of one case. Returns the outcome of the engine, with the number of steps of a game.
+    if engine == 'replicas':
+        return run_moran_replicas(p, args.replicas)
+    return run_moran_game(p, return_steps=True)
+
+
+def trajectory(p, engine, outcome):
+    # Trajectory summary of an outcome of run_engine: number of steps (of all replicas), fixation step or None
+    # and the scores, which only depend on the seed.
+    if engine == 'replicas':
+        fixation_step, scores = outcome
+        fixated = fixation_step[fixation_step >= 0]
+        steps = int(fixation_step.clip(min=0).sum()) + (len(fixation_step) - len(fixated)) * p.steps
+        return {'steps': steps, 'fixated': len(fixated),
+                'fixation_step': float(fixated.mean()) if len(fixated) else None,
+                'scores': [sum(score[i] for score in scores) for i in range(p.num_of_players)]}
+    result, scores, steps = outcome
+    fixated = max(scores.values()) == p.n
+    return {'steps': steps, 'fixated': int(fixated), 'fixation_step': steps if fixated else None,
+            'scores': [scores[i] for i in range(p.num_of_players)]}
+
+
+def run_case(n, m, num_of_players, steps, seed, args):
+    # All engines on one configuration. The graph is cached before the timed runs, but wall_time still
+    # includes the setup of the game from the cache (rebuilding the graph is O(n + m), cached_setup_time);
+    # the setup is timed separately.
+    p = parameters(n, m, num_of_players, steps, seed, 'naive')
+    setup = measure_setup(p)
+
+    records = []
+    for engine in args.engines:
+        p = parameters(n, m, num_of_players, steps, seed, engine)
+        start = time.perf_counter()
+        outcome = run_engine(p, engine, args)
+        wall_time = time.perf_counter() - start
+        summary = trajectory(p, engine, outcome)
+        record = {'n': n, 'm': m, 'num_of_players': num_of_players, 'steps': steps, 'seed': seed,
+                  'engine': engine, 'wall_time': wall_time,
+                  'steps_per_second': summary['steps'] / wall_time if wall_time > 0 else None,
+                  'time_to_fixation': wall_time if summary['fixated'] and engine != 'replicas' else None,
+                  'trajectory': summary}
+        record.update(setup)
+        if args.memory:
+            # separate run, tracemalloc slows down the engines too much to time them at the same time
+            tracemalloc.start()
+            run_engine(p, engine, args)
+            record['peak_memory'] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        records.append(record)
+    return records
+
+
+def case_key(record):
+    return record['n'], record['m'], record['num_of_players'], record['steps'], record['seed'], record['engine']
+
+
+def compare(records, baseline, time_tolerance):
+    # Regressions against a baseline run: slower by more than time_tolerance (relative) in the game or in the
+    # setup. The games are played with the seeds of the baseline; a game that ends differently means the
+    # engine changed the trajectory, its timing is not comparable and the change is reported instead.
+    # Cases missing from the baseline are ignored.
+    baseline_records = {case_key(record): record for record in baseline['records']}
+    regressions = []
+    setups = set()
+    for record in records:
+        old = baseline_records.get(case_key(record))
+        if old is None:
+            continue
+        if record['trajectory'] != old['trajectory']:
+            regressions.append(f'{case_key(record)}: trajectory {record["trajectory"]}, '
+                               f'baseline {old["trajectory"]}')
+            continue
+        if record['wall_time'] > old['wall_time'] * (1 + time_tolerance):
+            regressions.append(f'{case_key(record)}: wall_time {record["wall_time"]:.4f}s, '
+                               f'baseline {old["wall_time"]:.4f}s')
+        # the setup is shared by the engines of a case
+        if case_key(record)[:-1] not in setups and record['setup_time'] > old['setup_time'] * (1 + time_tolerance):
+            setups.add(case_key(record)[:-1])
+            regressions.append(f'{case_key(record)[:-1]}: setup_time {record["setup_time"]:.4f}s, '
+                               f'baseline {old["setup_time"]:.4f}s')
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the Moran game engines: steps/s, time to fixation, '
+                                                 'memory and setup time.')
+    parser.add_argument('--n', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--m', type=int, nargs='+', default=[2])
+    parser.add_argument('--num-of-players', type=int, nargs='+', default=[2, 4])
+    parser.add_argument('--steps', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--seeds', type=int, nargs='+', default=[1, 2, 3])
+    parser.add_argument('--engines', choices=ENGINES, nargs='+', default=['naive', 'event'])
+    parser.add_argument('--replicas', type=int, default=100, help='number of games of the replicas engine')
+    parser.add_argument('--no-memory', dest='memory', action='store_false', help='skip the peak memory runs')
+    parser.add_argument('--output', default=None, help='write the results as JSON to this file (default: stdout)')
+    parser.add_argument('--compare', default=None, help='JSON file of a baseline run to check for regressions')
+    parser.add_argument('--time-tolerance', type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    records = []
+    for n in args.n:
+        for m in args.m:
+            for num_of_players in args.num_of_players:
+                for steps in args.steps:
+                    for seed in args.seeds:
+                        case_records = run_case(n, m, num_of_players, steps, seed, args)
+                        for record in case_records:
+                            print(f'n:{n}, m:{m}, num_of_players:{num_of_players}, steps:{steps}, seed:{seed}, '
+                                  f'engine:{record["engine"]}, time:{record["wall_time"]:.4f}s, '
+                                  f'steps/s:{record["steps_per_second"]:.0f}, '
+                                  f'setup:{record["setup_time"]:.4f}s', file=sys.stderr)
+                        records.extend(case_records)
+                    GRAPH_CACHE.clear()
+
+    result = {'python': platform.python_version(), 'machine': platform.machine(), 'args': vars(args),
+              'records': records}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=1)
+    else:
+        print(json.dumps(result, indent=1))
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(records, baseline, args.time_tolerance)
+        for regression in regressions:
+            print(f'Regression: {regression}', file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
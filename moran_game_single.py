@@ -1,14 +1,27 @@
 import abc
+import array
+import bisect
 import collections
+import collections.abc
+import concurrent.futures
+import contextlib
 import copy
+import itertools
+import json
+import math
+import multiprocessing
+import os
 import random
-import sys
+import struct
+import time
 import traceback
 from collections import Counter
+from multiprocessing import shared_memory
 from typing import List, Dict
 
 import matplotlib.pyplot as plt
 import networkx as nx
+import numpy as np
 import seaborn as sns  # for color palettes
 
 
@@ -66,9 +79,19 @@ class Parameters:
     steps: int  # maximum number of steps
     assignment: list  # the assignment of strategies to the players (or else, the order of the players)
     interactive: bool  # flag: interactive execution, else batch execution
+    engine: str  # 'naive': every step picks a random node, 'event': only steps that can change the board are run
+    history: str  # retention of the game history: 'full', 'ring' (last history_size moves) or 'none'
+    history_size: int  # number of moves kept by a 'ring' history
+    history_spill: str  # file that a 'full' history is spilled to in chunks, or None to keep it in memory
+    assignment_method: str  # initial assignment: 'sample' (rng.sample per player) or 'shuffle' (one shuffle, O(n))
+    graph_cache: bool  # flag: take the graph from GRAPH_CACHE instead of generating it
+    move_timeout: float  # seconds per move of a player running in a worker process (None: no limit)
+    game_timeout: float  # seconds per game of a player running in a worker process (None: no limit)
 
     # constructor
-    def __init__(self, num_of_players, n, m, steps, seed, assignment, interactive):
+    def __init__(self, num_of_players, n, m, steps, seed, assignment, interactive, engine='naive', history='full',
+                 history_size=None, history_spill=None, assignment_method='sample', graph_cache=True,
+                 move_timeout=None, game_timeout=None):
         self.num_of_players = num_of_players
         self.n = n
         self.m = m
@@ -76,6 +99,14 @@ class Parameters:
         self.seed = seed
         self.interactive = interactive
         self.assignment = assignment
+        self.engine = engine
+        self.history = history
+        self.history_size = history_size
+        self.history_spill = history_spill
+        self.assignment_method = assignment_method
+        self.graph_cache = graph_cache
+        self.move_timeout = move_timeout
+        self.game_timeout = game_timeout
 
         self.player_ids = range(self.num_of_players)
         self.player_labels = {player_id: chr(65 + player_id) for player_id in self.player_ids}
@@ -91,24 +122,198 @@ class Parameters:
 game_move = collections.namedtuple('game_move', ('step', 'player_type', 'node_from', 'node_to', 'type_from'))
 
 
+class GameHistory(collections.abc.Sequence):
+    # Columnar history of the moves of a game: typed arrays for step, player_type, node_from, node_to and
+    # type_from (types as type codes, -1 for None), read back as game_move tuples.
+    # retention: 'full' keeps every move, 'ring' keeps the last `size` moves, 'none' keeps nothing.
+    # With 'full' retention and a spill path, every chunk_size moves are appended to that file as
+    # fixed-size records (RECORD layout) and dropped from memory; indexing reads them back from the file.
+    RECORD = struct.Struct('<qqqbb')  # step, node_from, node_to, player_type, type_from
+
+    # constructor
+    def __init__(self, labels, retention='full', size=None, spill=None, chunk_size=65536):
+        if retention not in ('full', 'ring', 'none'):
+            raise ValueError(f'Unknown history retention: {retention}')
+        if retention == 'ring' and not size:
+            raise ValueError('A ring history needs a size')
+        if spill is not None and retention != 'full':
+            raise ValueError('Only a full history can be spilled to disk')
+        self.labels = labels
+        self.retention = retention
+        self.size = size
+        self.spill = spill
+        self.chunk_size = chunk_size
+        self.total = 0  # number of moves recorded, including the ones that are no longer retained
+        self.spilled = 0  # number of moves in the spill file
+        self._file = None
+        self._codes = {label: t for t, label in enumerate(labels)}
+
+        self._step = array.array('q')
+        self._node_from = array.array('q')
+        self._node_to = array.array('q')
+        self._player_type = array.array('b')
+        self._type_from = array.array('b')
+        if retention == 'ring':
+            for column in self._columns():
+                column.extend([0] * size)
+
+    def __repr__(self):
+        return f"GameHistory({self.retention}, {len(self)}/{self.total})"
+
+    def _columns(self):
+        return self._step, self._node_from, self._node_to, self._player_type, self._type_from
+
+    def __len__(self):
+        if self.retention == 'ring':
+            return min(self.total, self.size)
+        if self.retention == 'none':
+            return 0
+        return self.total
+
+    def record(self, step, player_type, node_from, node_to, type_from):
+        # player_type and type_from are type codes, node_to and type_from are -1 for None
+        if self.retention == 'none':
+            pass
+        elif self.retention == 'ring':
+            i = self.total % self.size
+            self._step[i] = step
+            self._node_from[i] = node_from
+            self._node_to[i] = node_to
+            self._player_type[i] = player_type
+            self._type_from[i] = type_from
+        else:
+            self._step.append(step)
+            self._node_from.append(node_from)
+            self._node_to.append(node_to)
+            self._player_type.append(player_type)
+            self._type_from.append(type_from)
+            if self.spill is not None and len(self._step) >= self.chunk_size:
+                self.flush()
+        self.total += 1
+
+    def append(self, move):
+        # game_move compatible append
+        self.record(move.step, self._codes[move.player_type], move.node_from,
+                    -1 if move.node_to is None else move.node_to,
+                    -1 if move.type_from is None else self._codes[move.type_from])
+
+    def flush(self):
+        # Move the moves held in memory to the spill file
+        if self.spill is None or not self._step:
+            return
+        if self._file is None:
+            self._file = open(self.spill, 'w+b')
+        self._file.seek(0, 2)
+        self._file.write(b''.join(self.RECORD.pack(*row) for row in zip(*self._columns())))
+        self._file.flush()
+        self.spilled += len(self._step)
+        for column in self._columns():
+            del column[:]
+
+    def close(self):
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    @classmethod
+    def load(cls, path, labels):
+        # History of a finished game from its spill file
+        history = cls(labels, spill=path)
+        history.spilled = history.total = os.path.getsize(path) // cls.RECORD.size
+        return history
+
+    def _move(self, step, node_from, node_to, player_type, type_from):
+        return game_move(step, self.labels[player_type], node_from, None if node_to < 0 else node_to,
+                         None if type_from < 0 else self.labels[type_from])
+
+    def _read_bytes(self, start, count):
+        # the file of a recording history is open for writing, a loaded one is only read (it may be read-only)
+        if self._file is None:
+            self._file = open(self.spill, 'rb')
+        self._file.seek(start * self.RECORD.size)
+        return self._file.read(count * self.RECORD.size)
+
+    def _read(self, start, count):
+        return self.RECORD.iter_unpack(self._read_bytes(start, count))
+
+    def packed(self, start=0):
+        # The retained moves from move number start on (counted over the whole game), as RECORD bytes
+        start = max(start, self.total - len(self))
+        data = b''
+        if start < self.spilled:
+            data = self._read_bytes(start, self.spilled - start)
+            start = self.spilled
+        pack = self.RECORD.pack
+        rows = []
+        for move in range(start, self.total):
+            i = move % self.size if self.retention == 'ring' else move - self.spilled
+            rows.append(pack(self._step[i], self._node_from[i], self._node_to[i], self._player_type[i],
+                             self._type_from[i]))
+        return data + b''.join(rows)
+
+    def extend_packed(self, data):
+        # Record the moves of RECORD bytes from packed
+        for step, node_from, node_to, player_type, type_from in self.RECORD.iter_unpack(data):
+            self.record(step, player_type, node_from, node_to, type_from)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError('history index out of range')
+        if index < self.spilled:
+            return self._move(*next(self._read(index, 1)))
+        if self.retention == 'ring':
+            i = (self.total - length + index) % self.size
+        else:
+            i = index - self.spilled
+        return self._move(self._step[i], self._node_from[i], self._node_to[i], self._player_type[i],
+                          self._type_from[i])
+
+    def __iter__(self):
+        for start in range(0, self.spilled, self.chunk_size):
+            for row in self._read(start, min(self.chunk_size, self.spilled - start)):
+                yield self._move(*row)
+        for i in range(self.spilled, len(self)):
+            yield self[i]
+
+
 class GameInfo:
-    g: nx.graph  # The graph/network of the game
+    g: nx.graph  # The graph/network of the game (node attribute "types" is synced on access)
     num_of_players: int  # the number of distinct players
     n: int  # number of nodes
     m: int  # number of edges per new node (Barabasi-Albert)
     interactive: bool  # flag: interactive execution, else batch execution
-    history: List[game_move]
+    history: GameHistory
     initial_assignment = Dict
+    labels: List[str]  # type label of every type code, code t has label chr(65 + t)
+    types: array.array  # type code of every node
+    type_counts: List[int]  # number of nodes of every type code
+    num_of_active_types: int  # number of type codes with at least one node
 
     # constructor
     def __init__(self, num_of_players, g, n, m, interactive):
         self.num_of_players = num_of_players
-        self.g = g
+        self._g = g
         self.n = n
         self.m = m
         self.interactive = interactive
         self.initial_assignment = None
-        self.history: List[game_move] = []
+
+        self.labels = [chr(65 + t) for t in range(num_of_players)]
+        self.history = GameHistory(self.labels)
+        self.types = array.array('b', [-1]) * g.number_of_nodes()
+        self.type_counts = [0] * num_of_players
+        self.num_of_active_types = 0
+        # the "types" node attributes of g are written lazily: all of them on the first access of g, then
+        # by every takeover, so that players holding on to g see the current types
+        self._graph_synced = False
+        self._synced_types = None  # types the attributes were written from, for refresh_graph
+        self._view = None
 
     def __repr__(self):
         return "Game_Info()"
@@ -116,18 +321,133 @@ class GameInfo:
     def __str__(self):
         return f"num_of_players:{self.num_of_players}, g:{self.g}, n:{self.n}, m:{self.m}, interactive:{self.interactive} "
 
+    @property
+    def g(self):
+        self.sync_graph()
+        return self._g
+
+    @property
+    def view(self):
+        # read-only GameView for players, created on first use
+        if self._view is None:
+            self._view = GameView(self)
+        return self._view
+
+    def set_initial_types(self, node_type):
+        # node_type: dict node -> type code
+        for v, t in node_type.items():
+            self.types[v] = t
+            self.type_counts[t] += 1
+        self.num_of_active_types = sum(1 for count in self.type_counts if count > 0)
+        self._graph_synced = False
+
+    def take_over(self, node, type_code):
+        # Node becomes of type type_code, in O(1). Returns the previous type code of the node.
+        previous = self.types[node]
+        if previous != type_code:
+            self.types[node] = type_code
+            self.type_counts[previous] -= 1
+            if self.type_counts[previous] == 0:
+                self.num_of_active_types -= 1
+            if self.type_counts[type_code] == 0:
+                self.num_of_active_types += 1
+            self.type_counts[type_code] += 1
+            if self._graph_synced:
+                self._g.nodes[node]["types"] = self.labels[type_code]
+            if self._view is not None:
+                self._view._node_changed(node)
+        return previous
+
+    def type_of(self, node):
+        return self.labels[self.types[node]]
+
+    def sync_graph(self):
+        # Write the node types to the "types" attributes of the graph, for drawing and for players that read g
+        if not self._graph_synced:
+            nx.set_node_attributes(self._g, {v: self.labels[t] for v, t in enumerate(self.types)}, name="types")
+            self._synced_types = np.array(self.types, dtype=np.int8)
+            self._graph_synced = True
+
+    def refresh_graph(self):
+        # For mirrors whose types are changed in place instead of by take_over (worker processes): writes the
+        # "types" attributes of the nodes whose type changed since the last sync, if g has been synced
+        if self._graph_synced:
+            types = np.frombuffer(self.types, dtype=np.int8)
+            changed = np.flatnonzero(types != self._synced_types)
+            for v in changed.tolist():
+                self._g.nodes[v]["types"] = self.labels[self.types[v]]
+            self._synced_types[changed] = types[changed]
+
     def get_number_of_active_players(self):
-        node_types = nx.get_node_attributes(self.g, "types")
-        type_values = [k[0] for k in node_types.values()]
-        counter = Counter(type_values)
+        counter = Counter({self.labels[t]: count for t, count in enumerate(self.type_counts) if count > 0})
         distinct_type_keys = counter.keys()
         distinct_type_counts = counter.values()
 
-        # distinct_type_values = set(type_values)
         num_of_distinct_type_values = len(distinct_type_keys)
         return counter, num_of_distinct_type_values, distinct_type_keys, distinct_type_counts
 
 
+class GameView:
+    # Read-only view of the game state for Player.move implementations.
+    # Type lookups are O(1), neighbor tuples are computed once per node and foreign_neighbors is cached
+    # per node until the node or one of its neighbors changes type.
+
+    # constructor
+    def __init__(self, game_info):
+        self._types = game_info.types
+        self._labels = game_info.labels
+        self._type_counts = game_info.type_counts
+        self._adj = game_info._g.adj
+        self._neighbors = [None] * len(game_info.types)
+        self._foreign_cache = dict()  # node -> (my_type, foreign neighbors)
+
+    def __repr__(self):
+        return "GameView()"
+
+    @property
+    def n(self):
+        return len(self._types)
+
+    def type_of(self, node) -> str:
+        return self._labels[self._types[node]]
+
+    def neighbors(self, node) -> tuple:
+        neighbors = self._neighbors[node]
+        if neighbors is None:
+            neighbors = tuple(self._adj[node])
+            self._neighbors[node] = neighbors
+        return neighbors
+
+    def degree(self, node) -> int:
+        return len(self._adj[node])
+
+    def is_neighbor(self, u, v) -> bool:
+        return v in self._adj[u]
+
+    def foreign_neighbors(self, node, my_type=None) -> tuple:
+        # neighbors of node whose type is not my_type (default: the type of node), in neighbor order
+        if my_type is None:
+            my_type = self.type_of(node)
+        cached = self._foreign_cache.get(node)
+        if cached is not None and cached[0] == my_type:
+            return cached[1]
+        types = self._types
+        labels = self._labels
+        foreign = tuple(v for v in self.neighbors(node) if labels[types[v]] != my_type)
+        self._foreign_cache[node] = (my_type, foreign)
+        return foreign
+
+    def type_counts(self) -> Dict[str, int]:
+        return {self._labels[t]: count for t, count in enumerate(self._type_counts) if count > 0}
+
+    def _node_changed(self, node):
+        # the type of node changed: drop the cached foreign neighbors of node and of its neighbors
+        cache = self._foreign_cache
+        cache.pop(node, None)
+        for v in self._adj[node]:
+            cache.pop(v, None)
+
+
 class PlayerOne(Player):
     def initialize(self, game_info, player_id, my_type, player_seed) -> None:
         # This function is called once before the game starts.
@@ -144,12 +464,8 @@ class PlayerOne(Player):
     def move(self, node) -> int:
         # This function is called everytime player b has been selected for a move
 
-        neighbors = self.game_info.g.neighbors(node)
-        list_of_neighbors = list(neighbors)
-        node_types = nx.get_node_attributes(self.game_info.g, "types")
-
         # Choose first foreign neighbor
-        targets = [v for v in list_of_neighbors if node_types[v] != self.my_type]
+        targets = self.game_info.view.foreign_neighbors(node, self.my_type)
         node = None
         if targets:
             node = targets[0]
@@ -172,12 +488,8 @@ class PlayerTwo(Player):
     def move(self, node) -> int:
         # This function is called everytime player b has been selected for a move
 
-        neighbors = self.game_info.g.neighbors(node)
-        list_of_neighbors = list(neighbors)
-        node_types = nx.get_node_attributes(self.game_info.g, "types")
-
         # Choose first foreign neighbor
-        targets = [v for v in list_of_neighbors if node_types[v] != self.my_type]
+        targets = self.game_info.view.foreign_neighbors(node, self.my_type)
         node = None
         if targets:
             node = targets[0]
@@ -200,12 +512,8 @@ class PlayerThree(Player):
     def move(self, node) -> int:
         # This function is called everytime player b has been selected for a move
 
-        neighbors = self.game_info.g.neighbors(node)
-        list_of_neighbors = list(neighbors)
-        node_types = nx.get_node_attributes(self.game_info.g, "types")
-
         # Choose first foreign neighbor
-        targets = [v for v in list_of_neighbors if node_types[v] != self.my_type]
+        targets = self.game_info.view.foreign_neighbors(node, self.my_type)
         node = None
         if targets:
             node = targets[0]
@@ -228,12 +536,8 @@ class PlayerFour(Player):
     def move(self, node) -> int:
         # This function is called everytime player b has been selected for a move
 
-        neighbors = self.game_info.g.neighbors(node)
-        list_of_neighbors = list(neighbors)
-        node_types = nx.get_node_attributes(self.game_info.g, "types")
-
         # Choose first foreign neighbor
-        targets = [v for v in list_of_neighbors if node_types[v] != self.my_type]
+        targets = self.game_info.view.foreign_neighbors(node, self.my_type)
         node = None
         if targets:
             node = targets[0]
@@ -276,31 +580,237 @@ def get_random_node(g, rng) -> int:
     return node
 
 
-def run_moran_game(p, player_one_class=None):
-    # Create random number generator
-    rng = random.Random(p.seed)
+class BoundaryTracker:
+    # Candidate boundary nodes of the game, for the event engine. The candidates are a superset of the
+    # nodes with at least one foreign neighbor: every node whose neighborhood changed is added in O(deg),
+    # and candidates that turn out to be interior are dropped when they are sampled.
+    # The candidates are kept in a list with the position of every node, for O(1) sampling and removal.
 
-    # Create random graph
-    G = nx.barabasi_albert_graph(p.n, p.m, rng.randint(0, 10000000))
+    # constructor
+    def __init__(self, game_info):
+        self._view = game_info.view
+        n = len(game_info.types)
+        self.nodes = [v for v in range(n) if self._view.foreign_neighbors(v)]
+        self.position = array.array('l', [-1]) * n
+        for i, v in enumerate(self.nodes):
+            self.position[v] = i
 
-    # Player runtimes
-    player_runtimes = dict()
+    def __repr__(self):
+        return "BoundaryTracker()"
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def _add(self, v):
+        if self.position[v] < 0:
+            self.position[v] = len(self.nodes)
+            self.nodes.append(v)
+
+    def _remove(self, v):
+        i = self.position[v]
+        last = self.nodes.pop()
+        if last != v:
+            self.nodes[i] = last
+            self.position[last] = i
+        self.position[v] = -1
+
+    def update(self, node):
+        # the type of node changed: it and its neighbors may have become boundary nodes
+        self._add(node)
+        position = self.position
+        for v in self._view.neighbors(node):
+            if position[v] < 0:
+                self._add(v)
+
+    def next_event(self, rng, limit=None):
+        # Number of steps until the naive engine would pick a boundary node and that node. Every step picks
+        # a candidate with probability |candidates| / n, so the steps between candidate picks are geometric;
+        # picks of interior candidates are no-op steps. Returns (skip, None) if no boundary node is picked
+        # within limit steps, or if there are no boundary nodes at all.
+        n = len(self.position)
+        skip = 0
+        while self.nodes:
+            q = len(self.nodes) / n
+            skip += 1
+            if q < 1:
+                skip += int(math.log(1.0 - rng.random()) / math.log(1.0 - q))
+            if limit is not None and skip > limit:
+                return skip, None
+            v = self.nodes[rng.randrange(len(self.nodes))]
+            if self._view.foreign_neighbors(v):
+                return skip, v
+            self._remove(v)
+        return skip, None
+
+
+def game_result(p, game_info, player_runtimes, player_from_type, step):
+    # Result string and number of nodes per player of a finished game
+    types = game_info.types
+    labels = game_info.labels
+    num_of_types = game_info.num_of_active_types
+    # print(f'Parameters {p}, Fixation {distinct_keys} {distinct_counts} after {step} number of steps!')
+    # count in node order, so that ties between leading players are listed as before
+    counter = Counter(labels[t] for t in types)
+    distinct_keys = counter.keys()
+    distinct_counts = counter.values()
+    counters = {}
+    for i in range(p.num_of_players):
+        player_runtime = player_runtimes[i]
+        counters[player_runtime.player.name + ':' + player_runtime.player.my_type] = counter[
+            player_runtime.player_type]
+    # print(counters)
+    if num_of_types == 1:
+        player_type = labels[types[0]]
+        player_id = player_from_type[player_type]
+        player_name = player_runtimes[player_id].player.name
+        fixation_info: str = player_name
+    else:
+        fixation_info: str = '-'
+    # leading player
+    max_value = max(distinct_counts)
+    # max_index = distinct_counts.index(max_value)
+    indices = [index for index, value in enumerate(distinct_counts) if value == max_value]
+    winner_info: str = ""
+    for player_index in indices:
+        player_type = list(distinct_keys)[player_index]
+        player_id = player_from_type[player_type]
+        player_name = player_runtimes[player_id].player.name
+        winner_info += player_name + " "
+    result: str = f'Parameters: {p}, Fixation: {fixation_info.center(10, " ")}, Winner: {winner_info}, {step}: steps! '
+    for s in counters.keys():
+        result += s + ':' + str(counters[s]) + ','
+    for i in range(p.num_of_players):
+        player = player_runtimes[i].player
+        if isinstance(player, RemotePlayer) and player.timeouts > 0:
+            result += f' Timeouts {player.name}:{player.timeouts},'
 
-    if p.num_of_players >= 1:
-        player_runtimes[0] = PlayerRuntime()
-        if player_one_class:
-            player_runtimes[0].player_class = player_one_class
+    # prepare dict with #nodes per player_id
+    score_per_player_id = {}
+    for i in range(p.num_of_players):
+        score_per_player_id[i] = 0
+    for t in counter:
+        score = counter[t]
+        player_id = player_from_type[t]
+        score_per_player_id[player_id] = score
+
+    return result, score_per_player_id
+
+
+def adjacency_arrays(g):
+    # CSR adjacency of g with nodes 0..n-1: the neighbors of node v are indices[indptr[v]:indptr[v + 1]], in
+    # the order of g.adj[v] (the order the players see them in)
+    n = g.number_of_nodes()
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(g.adj[v]) for v in range(n)])
+    indices = np.fromiter((u for v in range(n) for u in g.adj[v]), dtype=np.int64, count=indptr[-1])
+    return indptr, indices
+
+
+class GraphCache:
+    # LRU cache of the Barabasi-Albert graphs of the games, keyed by (n, m, graph seed). The graphs are kept as
+    # compact CSR arrays (adjacency_arrays) and a new networkx graph is built from them for every game, with
+    # the same neighbor order as the generated graph, so games on cached graphs are identical.
+    # With a directory, the arrays are also stored there and shared between processes and runs.
+    maxsize: int  # number of graphs kept in memory
+    directory: str  # directory of the on-disk store, or None
+    hits: int
+    misses: int
+
+    # constructor
+    def __init__(self, maxsize=16, directory=None):
+        self.maxsize = maxsize
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self._graphs = collections.OrderedDict()  # (n, m, graph seed) -> (indptr, indices)
+
+    def __repr__(self):
+        return "GraphCache()"
+
+    def __len__(self):
+        return len(self._graphs)
+
+    def clear(self):
+        self._graphs.clear()
+
+    def _path(self, key):
+        return os.path.join(self.directory, 'ba_%d_%d_%d.npz' % key)
+
+    def get(self, n, m, graph_seed):
+        # A new graph equal to nx.barabasi_albert_graph(n, m, graph_seed)
+        key = (n, m, graph_seed)
+        arrays = self._graphs.get(key)
+        if arrays is not None:
+            self._graphs.move_to_end(key)
+            self.hits += 1
+            return graph_from_adjacency_arrays(*arrays)
+
+        self.misses += 1
+        path = None if self.directory is None else self._path(key)
+        if path is not None and os.path.exists(path):
+            with np.load(path) as data:
+                arrays = data['indptr'], data['indices']
+            g = graph_from_adjacency_arrays(*arrays)
         else:
-            player_runtimes[0].player_class = PlayerOne
-    if p.num_of_players >= 2:
-        player_runtimes[1] = PlayerRuntime()
-        player_runtimes[1].player_class = PlayerTwo
-    if p.num_of_players >= 3:
-        player_runtimes[2] = PlayerRuntime()
-        player_runtimes[2].player_class = PlayerThree
-    if p.num_of_players >= 4:
-        player_runtimes[3] = PlayerRuntime()
-        player_runtimes[3].player_class = PlayerFour
+            g = nx.barabasi_albert_graph(n, m, graph_seed)
+            indptr, indices = adjacency_arrays(g)
+            dtype = np.int32 if n < 2 ** 31 else np.int64
+            arrays = indptr.astype(dtype), indices.astype(dtype)
+            if path is not None:
+                os.makedirs(self.directory, exist_ok=True)
+                # write and rename, so that other processes never read a partial file
+                temporary = f'{path}.{os.getpid()}.tmp.npz'
+                np.savez(temporary, indptr=arrays[0], indices=arrays[1])
+                os.replace(temporary, path)
+        if self.maxsize > 0:
+            self._graphs[key] = arrays
+            if len(self._graphs) > self.maxsize:
+                self._graphs.popitem(last=False)
+        return g
+
+
+GRAPH_CACHE = GraphCache()
+
+
+def graph_from_adjacency_arrays(indptr, indices):
+    # networkx graph with the CSR adjacency of adjacency_arrays, neighbors in the same order
+    n = len(indptr) - 1
+    source = np.repeat(np.arange(n), np.diff(indptr))
+    _, edge_of_slot = np.unique(np.minimum(source, indices) * n + np.maximum(source, indices), return_inverse=True)
+    # one data dict per edge, shared by both directions as in add_edge
+    edge_data = [{} for _ in range(len(indices) // 2)]
+    data_of_slot = [edge_data[e] for e in edge_of_slot.tolist()]
+    g = nx.Graph()
+    g.add_nodes_from(range(n))
+    adj = g._adj
+    indptr = indptr.tolist()
+    indices = indices.tolist()
+    for v in range(n):
+        start, end = indptr[v], indptr[v + 1]
+        adj[v].update(zip(indices[start:end], data_of_slot[start:end]))
+    return g
+
+
+def create_game_setup(p):
+    # Graph and initial assignment (node -> player id) of a game. Both only depend on p, so a game can be
+    # set up again without running it. Returns the random number generator of the game positioned after the
+    # setup, the engine keeps using it for the player seeds and the steps.
+    # Random numbers drawn from the generator, in this order:
+    #   1. rng.randint(0, 10000000): the seed of the graph. The graph is generated with its own generator, so
+    #      a graph from GRAPH_CACHE (p.graph_cache) consumes nothing more and the game is the same.
+    #   2. the initial assignment: one rng.sample of the unassigned nodes per player ('sample', the original
+    #      method), or one rng.shuffle of the list of nodes ('shuffle'). The methods give different games.
+    # run_moran_game then draws one rng.randint(0, 1000000) per player (the player seeds) and the random nodes.
+
+    # Create random number generator
+    rng = random.Random(p.seed)
+
+    # Create random graph
+    graph_seed = rng.randint(0, 10000000)
+    if p.graph_cache:
+        G = GRAPH_CACHE.get(p.n, p.m, graph_seed)
+    else:
+        G = nx.barabasi_albert_graph(p.n, p.m, graph_seed)
 
     # Initial Assignment
     n = G.number_of_nodes()
@@ -315,6 +825,20 @@ def run_moran_game(p, player_one_class=None):
         else:
             number_of_nodes_of_player[i] = nodes_per_player
 
+    if p.assignment_method == 'shuffle':
+        # O(n): the players get consecutive slices of one random permutation of the nodes
+        nodes = list(range(n))
+        rng.shuffle(nodes)
+        node_type = dict()
+        start = 0
+        for i in range(p.num_of_players):
+            for v in nodes[start:start + number_of_nodes_of_player[i]]:
+                node_type[v] = p.assignment[i]
+            start += number_of_nodes_of_player[i]
+        return rng, G, node_type
+    if p.assignment_method != 'sample':
+        raise ValueError(f'Unknown assignment method: {p.assignment_method}')
+
     node_type = dict()
     nodes_of_player = dict()
     unassigned_nodes = set(range(n))
@@ -329,69 +853,357 @@ def run_moran_game(p, player_one_class=None):
     if len(unassigned_nodes) > 0:
         print(f'ERROR: Some nodes are still unassigned: {len(unassigned_nodes)}')
 
-    types = []
-    nx.set_node_attributes(G, types, "types")
-    for v in G.nodes:
-        t = node_type[v]
-        label = p.player_labels[t]
-        nx.set_node_attributes(G, {v: label}, name="types")
+    return rng, G, node_type
+
+
+def _player_worker(conn):
+    # Main loop of a PlayerProcessPool worker. Messages (kind, ...):
+    #   ('start', player class, p, player id, type, player seed, shared memory name): sets up a mirror of the
+    #       game (create_game_setup) whose node types are the shared memory, and initializes the player;
+    #       answers (name, version)
+    #   ('move', node, type counts, history RECORD bytes since the last move): answers the move of the player
+    #   ('end',): releases the game, no answer; ('close',): exits
+    # Answers are ('ok', value) or ('error', traceback of an exception of the player).
+    game_info = player = shared = shared_types = None
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        kind = message[0]
+        if kind in ('end', 'close'):
+            if shared is not None:
+                game_info = player = None
+                shared_types.release()
+                shared.close()
+                shared = shared_types = None
+            if kind == 'close':
+                break
+            continue
+        try:
+            if kind == 'start':
+                _, player_class, p, player_id, my_type, player_seed, shared_name = message
+                _, G, node_type = create_game_setup(p)
+                game_info = GameInfo(p.num_of_players, G, p.n, p.m, False)
+                game_info.set_initial_types(node_type)
+                game_info.game_initial_assignment = node_type
+                game_info.history = GameHistory(game_info.labels, p.history, p.history_size)
+                shared = shared_memory.SharedMemory(shared_name)
+                shared_types = shared.buf[:len(game_info.types)].cast('b')
+                game_info.types = shared_types
+                player = player_class()
+                player.initialize(game_info, player_id, my_type, player_seed)
+                value = (player.name, player.version)
+            else:
+                _, node, type_counts, records = message
+                # the types in shared memory are current, the rest of the mirror is brought up to date
+                game_info.type_counts[:] = type_counts
+                game_info.num_of_active_types = sum(1 for count in type_counts if count > 0)
+                game_info.history.extend_packed(records)
+                game_info.refresh_graph()
+                if game_info._view is not None:
+                    game_info._view._foreign_cache.clear()
+                value = player.move(node)
+            conn.send(('ok', value))
+        except Exception:
+            conn.send(('error', traceback.format_exc()))
+
+
+class PlayerProcessPool:
+    # Persistent worker processes for RemotePlayer, one per player slot of a game, reused across games.
+    # A worker that is still busy with a timed out move at the end of a game is replaced.
 
-    game_info = GameInfo(p.num_of_players, G, p.n, p.m, p.interactive)
+    # constructor
+    def __init__(self, start_method=None):
+        self._context = multiprocessing.get_context(start_method)
+        self._workers = dict()  # slot -> (process, connection)
 
-    # initial assignment
-    game_info.game_initial_assignment = copy.deepcopy(node_type)
+    def __repr__(self):
+        return "PlayerProcessPool()"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+
+    def connection(self, slot):
+        # Connection to the worker of slot, started if needed
+        worker = self._workers.get(slot)
+        if worker is None or not worker[0].is_alive():
+            conn, worker_conn = self._context.Pipe()
+            process = self._context.Process(target=_player_worker, args=(worker_conn,), daemon=True)
+            process.start()
+            worker_conn.close()
+            worker = self._workers[slot] = (process, conn)
+        return worker[1]
+
+    def restart(self, slot):
+        worker = self._workers.pop(slot, None)
+        if worker is not None:
+            worker[0].terminate()
+            worker[0].join()
+            worker[1].close()
+
+    def end_game(self, players):
+        # players: dict slot -> RemotePlayer of a finished game
+        for slot, player in players.items():
+            if player.busy:
+                self.restart(slot)
+            elif slot in self._workers:
+                self._workers[slot][1].send(('end',))
+
+    def close(self):
+        for slot, (process, conn) in list(self._workers.items()):
+            try:
+                conn.send(('close',))
+            except OSError:
+                pass
+            process.join(1)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+            conn.close()
+        self._workers.clear()
+
+
+class RemotePlayer(Player):
+    # Player of player_class that runs in a worker process of a PlayerProcessPool.
+    # A move that is not answered within p.move_timeout seconds, or within what is left of p.game_timeout
+    # (the total time the player may take in a game, initialize included), counts as a timeout and is a
+    # None move. A worker busy with a timed out move gets no new requests: its moves are timeouts until
+    # its late answer arrives, which is dropped.
+    timeouts: int  # number of timed out moves in the game
+    time_used: float  # seconds spent waiting for the worker in the game
 
-    # prepare history data structure
-    game_info.history = []
+    # constructor
+    def __init__(self, pool, slot, player_class, p, shared_name):
+        super().__init__()
+        self.name = player_class.__name__
+        self.version = ''
+        self.timeouts = 0
+        self.time_used = 0.0
+        self.busy = False
+        self._pool = pool
+        self._slot = slot
+        self._player_class = player_class
+        self._p = p
+        self._shared_name = shared_name
+        self._history_sent = 0  # moves of the history sent to the worker
 
-    # Create player objects
-    player_from_type = dict()
-    for i, player_runtime in enumerate(player_runtimes.values()):
-        # for player_type in player_classes:
-        player_runtime.player = player_runtime.player_class()
-        player_runtime.player_id = p.assignment[i]
-        player_runtime.player_type = p.player_labels[p.assignment[i]]
-        player_from_type[player_runtime.player_type] = i  # p.assignment[i]
+    def __repr__(self):
+        return f"RemotePlayer({self._player_class.__name__})"
 
-    # Initialize players
-    for player_runtime in player_runtimes.values():
-        player_seed = rng.randint(0, 1000000)
-        # player_runtime.player.initialize(G, p, player_runtime.player_id, player_runtime.player_type)
-        player_runtime.player.initialize(game_info, player_runtime.player_id, player_runtime.player_type, player_seed)
+    def initialize(self, game_info, player_id, my_type, player_seed) -> None:
+        self.game_info = game_info
+        self.player_id = player_id
+        self.my_type = my_type
+        self.player_seed = player_seed
+        answer = self._request(lambda: ('start', self._player_class, self._p, player_id, my_type, player_seed,
+                                        self._shared_name), self._p.game_timeout)
+        if answer is not None:
+            self.name, self.version = answer
+
+    def move(self, node) -> int:
+        return self._request(lambda: self._move_message(node), self._p.move_timeout)
+
+    def _move_message(self, node):
+        # the history moves the worker has not seen yet are only taken when the message is sent
+        history = self.game_info.history
+        records = history.packed(self._history_sent)
+        self._history_sent = history.total
+        return 'move', node, tuple(self.game_info.type_counts), records
+
+    def _request(self, make_message, timeout):
+        # Answer of the worker to the message make_message() returns, or None if it times out. The message is
+        # only made if it is sent.
+        conn = self._pool.connection(self._slot)
+        if self.busy:
+            if not conn.poll(0):
+                self.timeouts += 1
+                return None
+            self._receive(conn)
+        if self._p.game_timeout is not None:
+            remaining = self._p.game_timeout - self.time_used
+            if remaining <= 0:
+                self.timeouts += 1
+                return None
+            timeout = remaining if timeout is None else min(timeout, remaining)
+
+        start = time.perf_counter()
+        conn.send(make_message())
+        self.busy = True
+        answered = conn.poll(timeout)
+        self.time_used += time.perf_counter() - start
+        if not answered:
+            self.timeouts += 1
+            return None
+        return self._receive(conn)
+
+    def _receive(self, conn):
+        try:
+            status, value = conn.recv()
+        except EOFError:
+            raise Exception(f'The worker process of player {self.name} exited') from None
+        self.busy = False
+        if status == 'error':
+            raise Exception(f'Player {self.name} failed in its worker process:\n{value}')
+        return value
+
+
+class GameStats:
+    # Opt-in instrumentation of run_moran_game (stats=GameStats()): time per phase, move latency histogram
+    # per player, steps per second and the numbers of takeover and no-op steps. observers are called after
+    # every played step with (step, player index, node, move, previous type code of move or -1); the steps
+    # skipped by the event engine are counted but not observed. as_dict() exports everything.
+    # Latencies are counted in log2 buckets: bucket b holds the moves that took [2^(b-1), 2^b) nanoseconds.
+    PHASES = ('setup', 'initialize', 'select', 'move', 'validate', 'update', 'history', 'result')
+    phase_times: Dict[str, float]  # seconds per phase
+    move_latency: Dict[int, Counter]  # player index -> latency bucket -> number of moves
+    steps: int  # number of steps of the game, skipped steps included
+    played_steps: int  # number of steps whose player was asked to move
+    takeovers: int  # number of steps that changed the type of a node
+    none_moves: int  # number of None moves
+
+    # constructor
+    def __init__(self, observers=None):
+        self.observers = list(observers) if observers else []
+        self.phase_times = {phase: 0.0 for phase in self.PHASES}
+        self.move_latency = collections.defaultdict(Counter)
+        self.move_time = collections.defaultdict(float)
+        self.max_move_time = collections.defaultdict(float)
+        self.player_names = dict()
+        self.timeouts = dict()
+        self.steps = 0
+        self.played_steps = 0
+        self.takeovers = 0
+        self.none_moves = 0
 
-    # types.append("A")
+    def __repr__(self):
+        return "GameStats()"
+
+    def step(self, times, player_id, step, node, move, previous, changed):
+        # times: clock at the start of the step and after each of the phases select .. history
+        phase_times = self.phase_times
+        phase_times['select'] += times[1] - times[0]
+        phase_times['move'] += times[2] - times[1]
+        phase_times['validate'] += times[3] - times[2]
+        phase_times['update'] += times[4] - times[3]
+        phase_times['history'] += times[5] - times[4]
+        latency = times[2] - times[1]
+        self.move_latency[player_id][int(latency * 1e9).bit_length()] += 1
+        self.move_time[player_id] += latency
+        if latency > self.max_move_time[player_id]:
+            self.max_move_time[player_id] = latency
+        self.played_steps += 1
+        if move is None:
+            self.none_moves += 1
+        elif changed:
+            self.takeovers += 1
+        for observer in self.observers:
+            observer(step, player_id, node, move, previous)
+
+    @property
+    def no_ops(self):
+        # steps that did not change the board, skipped steps included
+        return self.steps - self.takeovers
+
+    @property
+    def steps_per_second(self):
+        play_time = sum(self.phase_times[phase] for phase in ('select', 'move', 'validate', 'update', 'history'))
+        return self.steps / play_time if play_time > 0 else None
+
+    def as_dict(self):
+        players = dict()
+        for player_id, name in self.player_names.items():
+            moves = sum(self.move_latency[player_id].values())
+            players[player_id] = {
+                'name': name, 'moves': moves, 'move_time': self.move_time[player_id],
+                'mean_move_time': self.move_time[player_id] / moves if moves else None,
+                'max_move_time': self.max_move_time[player_id],
+                'latency_histogram': [{'le': 2 ** bucket * 1e-9, 'count': count}
+                                      for bucket, count in sorted(self.move_latency[player_id].items())]}
+            if player_id in self.timeouts:
+                players[player_id]['timeouts'] = self.timeouts[player_id]
+        return {'phase_times': dict(self.phase_times), 'steps': self.steps, 'played_steps': self.played_steps,
+                'takeovers': self.takeovers, 'no_ops': self.no_ops, 'none_moves': self.none_moves,
+                'steps_per_second': self.steps_per_second, 'players': players}
+
+
+def _play_moran_steps(p, rng, G, game_info, player_runtimes, player_from_type, shared_types=None, stats=None):
+    # The steps of run_moran_game. shared_types: buffer that takeovers are mirrored to, for RemotePlayers.
+    # stats: GameStats to record the steps in. Returns the number of steps.
     if p.interactive:
         pos = nx.spring_layout(G)
 
+    types = game_info.types
+    labels = game_info.labels
+
+    # The event engine skips the steps whose random node has no foreign neighbor: the number of skipped
+    # steps is drawn at once and the player of such a node is not asked to move (players must not change
+    # the board from interior nodes). If no takeover is possible any more, the game jumps to p.steps.
+    boundary = BoundaryTracker(game_info) if p.engine == 'event' else None
+
+    if stats is not None:
+        clock = time.perf_counter
+        start = clock()
+
     step = 0
     end_loop = False
+    if boundary is not None and (game_info.num_of_active_types == 1 or p.steps == 0):
+        # the naive engine plays at least one step, a no-op on a fixated board
+        step = 1
+        end_loop = True
     while not end_loop:
-        random_node = get_random_node(G, rng)
-        types = nx.get_node_attributes(G, "types")
-        node_type = types[random_node][0]
-
-        if node_type in p.player_labels.values():
-            player_id = player_from_type[node_type]
-            player_runtime = player_runtimes[player_id]
-            move = player_runtime.player.move(random_node)
-            if move not in list(G.neighbors(random_node)) and move != random_node and move is not None:
-                raise Exception(f'Invalid move: Node {move} is not a neighbor of node {random_node} in step {step}')
+        if stats is not None:
+            t0 = clock()
+        if boundary is None:
+            random_node = get_random_node(G, rng)
         else:
-            traceback.print_exc()
-            sys.exit(f'Error: unexpected type: {type}')
-
-        type_from = types.get(move, None)
-        nx.set_node_attributes(G, {move: node_type}, name="types")
-        game_info.history.append(game_move(step, node_type, random_node, move, type_from))
-        counter, num_of_types, distinct_keys, distinct_counts = game_info.get_number_of_active_players()
+            skip, random_node = boundary.next_event(rng, None if p.steps is None else p.steps - step)
+            if random_node is None:
+                if p.steps is not None:
+                    step = p.steps
+                break
+            step += skip - 1
+        node_type = labels[types[random_node]]
+
+        player_id = player_from_type[node_type]
+        player_runtime = player_runtimes[player_id]
+        if stats is not None:
+            t1 = clock()
+        move = player_runtime.player.move(random_node)
+        if stats is not None:
+            t2 = clock()
+        if move is not None and move != random_node and move not in G.adj[random_node]:
+            raise Exception(f'Invalid move: Node {move} is not a neighbor of node {random_node} in step {step}')
+        if stats is not None:
+            t3 = clock()
+
+        previous = -1
+        if move is not None:
+            previous = game_info.take_over(move, types[random_node])
+            if previous != types[move]:
+                if boundary is not None:
+                    boundary.update(move)
+                if shared_types is not None:
+                    shared_types[move] = types[move]
+        if stats is not None:
+            t4 = clock()
+        game_info.history.record(step, types[random_node], random_node, -1 if move is None else move, previous)
+        if stats is not None:
+            stats.step((t0, t1, t2, t3, t4, clock()), player_id, step, random_node, move, previous,
+                       move is not None and previous != types[move])
+        num_of_types = game_info.num_of_active_types
         if p.interactive:
+            counter, num_of_types, distinct_keys, distinct_counts = game_info.get_number_of_active_players()
             print(f'{node_type}:{random_node} -> {move}')
             print(
                 f'Step: {step}, Number of types: {num_of_types}, distinct_keys: {distinct_keys}, distinct_counts: {distinct_counts}')
         step += 1
 
         if p.interactive:
-        #     draw_graph(G, pos, player_runtimes, counter)
+        #     draw_graph(game_info.g, pos, player_runtimes, counter)
             input("Press Enter to continue...")
         #     # time.sleep(0.1)
 
@@ -401,62 +1213,478 @@ def run_moran_game(p, player_one_class=None):
             # print(f'Maximum number of steps reached')
             end_loop = True
 
-        if end_loop:
-            # print(f'Parameters {p}, Fixation {distinct_keys} {distinct_counts} after {step} number of steps!')
-            counters = {}
-            for i in range(p.num_of_players):
-                player_runtime = player_runtimes[i]
-                counters[player_runtime.player.name + ':' + player_runtime.player.my_type] = counter[
-                    player_runtime.player_type]
-            # print(counters)
-            if num_of_types == 1:
-                node_types = nx.get_node_attributes(G, "types")
-                player_type = node_types[0]
-                player_id = player_from_type[player_type]
-                player_name = player_runtimes[player_id].player.name
-                fixation_info: str = player_name
-            else:
-                fixation_info: str = '-'
-            # leading player
-            max_value = max(distinct_counts)
-            # max_index = distinct_counts.index(max_value)
-            indices = [index for index, value in enumerate(distinct_counts) if value == max_value]
-            winner_info: str = ""
-            for player_index in indices:
-                player_type = list(distinct_keys)[player_index]
-                player_id = player_from_type[player_type]
-                player_name = player_runtimes[player_id].player.name
-                winner_info += player_name + " "
-            result: str = f'Parameters: {p}, Fixation: {fixation_info.center(10, " ")}, Winner: {winner_info}, {step}: steps! '
-            for s in counters.keys():
-                result += s + ':' + str(counters[s]) + ','
-
-            # prepare dict with #nodes per player_id
-            score_per_player_id = {}
-            for i in range(p.num_of_players):
-                score_per_player_id[i] = 0
-            for t in counter:
-                score = counter[t]
-                player_id = player_from_type[t]
-                score_per_player_id[player_id] = score
-
-            return result, score_per_player_id
-
-
-def evaluate_player_in_multiple_games(player_class, player_id, num_of_games, num_of_players, n, m, steps, seed):
+    if stats is not None:
+        # the steps skipped by the event engine at the end of the game are counted as selection
+        stats.phase_times['select'] += clock() - start - sum(
+            stats.phase_times[phase] for phase in ('select', 'move', 'validate', 'update', 'history'))
+        stats.steps = step
+    return step
+
+
+def run_moran_game(p, player_one_class=None, player_classes=None, player_pool=None, stats=None,
+                   return_steps=False):
+    # player_classes: optional list with the player class of every player, instead of player_one_class
+    # followed by the built-in players
+    # player_pool: PlayerProcessPool to run the players in, as RemotePlayers with the time limits of p. With
+    # p.move_timeout or p.game_timeout and no pool, a pool is started for the game.
+    # stats: GameStats that is filled with the instrumentation of the game
+    # return_steps: also return the number of steps of the game, as a third value
+    if p.engine not in ('naive', 'event'):
+        raise ValueError(f'Unknown engine: {p.engine}')
+    if stats is not None:
+        start = time.perf_counter()
+    rng, G, node_type = create_game_setup(p)
+
+    # Player runtimes
+    player_runtimes = dict()
+
+    if p.num_of_players >= 1:
+        player_runtimes[0] = PlayerRuntime()
+        if player_one_class:
+            player_runtimes[0].player_class = player_one_class
+        else:
+            player_runtimes[0].player_class = PlayerOne
+    if p.num_of_players >= 2:
+        player_runtimes[1] = PlayerRuntime()
+        player_runtimes[1].player_class = PlayerTwo
+    if p.num_of_players >= 3:
+        player_runtimes[2] = PlayerRuntime()
+        player_runtimes[2].player_class = PlayerThree
+    if p.num_of_players >= 4:
+        player_runtimes[3] = PlayerRuntime()
+        player_runtimes[3].player_class = PlayerFour
+    if player_classes is not None:
+        for i in range(p.num_of_players):
+            player_runtimes[i].player_class = player_classes[i]
+
+    game_info = GameInfo(p.num_of_players, G, p.n, p.m, p.interactive)
+    game_info.set_initial_types(node_type)
+
+    # initial assignment
+    game_info.game_initial_assignment = copy.deepcopy(node_type)
+
+    # prepare history data structure
+    game_info.history = GameHistory(game_info.labels, p.history, p.history_size, p.history_spill)
+
+    pool = player_pool
+    if pool is None and (p.move_timeout is not None or p.game_timeout is not None):
+        pool = PlayerProcessPool()
+    shared = shared_types = None
+    if pool is not None:
+        # the node types are shared with the worker processes, takeovers are written to shared_types
+        shared = shared_memory.SharedMemory(create=True, size=max(1, len(game_info.types)))
+        shared_types = shared.buf[:len(game_info.types)].cast('b')
+        shared_types[:] = game_info.types
+
+    # Create player objects
+    player_from_type = dict()
+    for i, player_runtime in enumerate(player_runtimes.values()):
+        # for player_type in player_classes:
+        if pool is None:
+            player_runtime.player = player_runtime.player_class()
+        else:
+            player_runtime.player = RemotePlayer(pool, i, player_runtime.player_class, p, shared.name)
+        player_runtime.player_id = p.assignment[i]
+        player_runtime.player_type = p.player_labels[p.assignment[i]]
+        player_from_type[player_runtime.player_type] = i  # p.assignment[i]
+
+    if stats is not None:
+        stats.phase_times['setup'] += time.perf_counter() - start
+        start = time.perf_counter()
+    try:
+        # Initialize players
+        for player_runtime in player_runtimes.values():
+            player_seed = rng.randint(0, 1000000)
+            # player_runtime.player.initialize(G, p, player_runtime.player_id, player_runtime.player_type)
+            player_runtime.player.initialize(game_info, player_runtime.player_id, player_runtime.player_type,
+                                             player_seed)
+        if stats is not None:
+            stats.phase_times['initialize'] += time.perf_counter() - start
+            for i, player_runtime in player_runtimes.items():
+                stats.player_names[i] = player_runtime.player.name
+
+        step = _play_moran_steps(p, rng, G, game_info, player_runtimes, player_from_type, shared_types, stats)
+    finally:
+        if pool is not None:
+            pool.end_game({i: player_runtime.player for i, player_runtime in player_runtimes.items()})
+            if player_pool is None:
+                pool.close()
+            shared_types.release()
+            shared.close()
+            shared.unlink()
+
+    game_info.history.close()
+    if stats is None:
+        result = game_result(p, game_info, player_runtimes, player_from_type, step)
+    else:
+        start = time.perf_counter()
+        result = game_result(p, game_info, player_runtimes, player_from_type, step)
+        stats.phase_times['result'] += time.perf_counter() - start
+        for i, player_runtime in player_runtimes.items():
+            if isinstance(player_runtime.player, RemotePlayer):
+                stats.timeouts[i] = player_runtime.player.timeouts
+    return (*result, step) if return_steps else result
+
+
+def run_moran_replicas(p, num_of_replicas, seed=None):
+    # Runs num_of_replicas independent games at once with NumPy, every player playing the "first foreign
+    # neighbor" rule of PlayerOne..PlayerFour. All replicas share the graph and the initial assignment of p
+    # (create_game_setup) and differ in the random nodes of the steps, which are drawn from a NumPy generator
+    # seeded with seed (default p.seed). The games follow the rules of run_moran_game, but the random nodes
+    # are not the ones of run_moran_game with the same seed, so results agree in distribution only.
+    # The board is a num_of_replicas x n matrix of type codes, a step of all active replicas is one gather
+    # over the neighbors of their random nodes.
+    # Returns (fixation step of every replica, -1 if it did not fixate within p.steps, and the number of
+    # nodes per player of every replica, like the score_per_player_id of run_moran_game).
+    _, G, node_type = create_game_setup(p)
+    n = G.number_of_nodes()
+    indptr, indices = adjacency_arrays(G)
+    rng = np.random.default_rng(p.seed if seed is None else seed)
+
+    initial = np.empty(n, dtype=np.int8)
+    initial[list(node_type.keys())] = list(node_type.values())
+    types = np.tile(initial, (num_of_replicas, 1))
+    counts = np.tile(np.bincount(initial, minlength=p.num_of_players), (num_of_replicas, 1))
+    fixation_step = np.full(num_of_replicas, -1, dtype=np.int64)
+    if counts[0].max() == n:
+        # run_moran_game stops after the first step
+        fixation_step[:] = 1
+    active = np.flatnonzero(fixation_step < 0)
+
+    step = 0
+    while len(active) > 0 and (p.steps is None or step < p.steps):
+        nodes = rng.integers(0, n, size=len(active))
+        start = indptr[nodes]
+        degree = indptr[nodes + 1] - start
+        rows = active
+        if not degree.all():
+            keep = degree > 0
+            nodes, start, degree, rows = nodes[keep], start[keep], degree[keep], rows[keep]
+        step += 1
+        if len(rows) == 0:
+            continue
+
+        # neighbor slots of all random nodes, one segment per replica
+        offsets = np.zeros(len(rows), dtype=np.int64)
+        np.cumsum(degree[:-1], out=offsets[1:])
+        total = offsets[-1] + degree[-1]
+        slots = np.arange(total) + np.repeat(start - offsets, degree)
+        own = types[rows, nodes]
+        neighbor = indices[slots]
+        foreign = types[np.repeat(rows, degree), neighbor] != np.repeat(own, degree)
+        first = np.minimum.reduceat(np.where(foreign, np.arange(total), total), offsets)
+
+        hit = first < total
+        if not hit.any():
+            continue
+        rows, own = rows[hit], own[hit]
+        target = neighbor[first[hit]]
+        previous = types[rows, target]
+        types[rows, target] = own
+        counts[rows, previous] -= 1
+        counts[rows, own] += 1
+
+        fixated = counts[rows, own] == n
+        if fixated.any():
+            fixation_step[rows[fixated]] = step
+            active = np.flatnonzero(fixation_step < 0)
+
+    scores = [{i: int(counts[r, p.assignment[i]]) for i in range(p.num_of_players)} for r in range(num_of_replicas)]
+    return fixation_step, scores
+
+
+class GameReplay:
+    # Replays a recorded game from its initial assignment and history, without running player code.
+    # Only takeovers (moves that change the type of a node) are kept. The board is stored every
+    # checkpoint_interval takeovers, so seeking anywhere applies or undoes at most that many takeovers.
+
+    # constructor
+    def __init__(self, g, initial_assignment, history, num_of_players, checkpoint_interval=1000):
+        if len(history) != getattr(history, 'total', len(history)):
+            raise ValueError(f'The history is incomplete ({len(history)} of {history.total} moves), a game can '
+                             f'only be replayed from a full history')
+        self.g = g
+        self.labels = [chr(65 + t) for t in range(num_of_players)]
+        self.checkpoint_interval = checkpoint_interval
+        codes = {label: t for t, label in enumerate(self.labels)}
+
+        self.types = array.array('b', [-1]) * g.number_of_nodes()
+        for v, t in initial_assignment.items():
+            self.types[v] = t
+        self.type_counts = [0] * num_of_players
+        for t in self.types:
+            self.type_counts[t] += 1
+
+        # takeover columns: step, node, new type, previous type
+        self._steps = array.array('q')
+        self._nodes = array.array('q')
+        self._new_types = array.array('b')
+        self._old_types = array.array('b')
+        self._checkpoints = []
+        types = array.array('b', self.types)
+        for move in history:
+            if move.node_to is None or move.type_from == move.player_type:
+                continue
+            if len(self._steps) % checkpoint_interval == 0:
+                self._checkpoints.append(types.tobytes())
+            new_type = codes[move.player_type]
+            types[move.node_to] = new_type
+            self._steps.append(move.step)
+            self._nodes.append(move.node_to)
+            self._new_types.append(new_type)
+            self._old_types.append(codes[move.type_from])
+        self.position = 0  # number of takeovers applied to types
+        self._node_pos = None
+
+    def __repr__(self):
+        return "GameReplay()"
+
+    def __len__(self):
+        return len(self._steps)
+
+    @classmethod
+    def from_parameters(cls, p, history, checkpoint_interval=1000):
+        # Set up the graph and initial assignment of the game again from p
+        _, G, node_type = create_game_setup(p)
+        return cls(G, node_type, history, p.num_of_players, checkpoint_interval)
+
+    @property
+    def step(self):
+        # the board shows the state after all steps before this one
+        return self._steps[self.position - 1] + 1 if self.position > 0 else 0
+
+    def forward(self):
+        # Apply the next takeover, returns False at the end of the game
+        if self.position >= len(self._steps):
+            return False
+        i = self.position
+        self._set_type(self._nodes[i], self._new_types[i])
+        self.position += 1
+        return True
+
+    def backward(self):
+        # Undo the previous takeover, returns False at the start of the game
+        if self.position == 0:
+            return False
+        self.position -= 1
+        i = self.position
+        self._set_type(self._nodes[i], self._old_types[i])
+        return True
+
+    def seek(self, step):
+        # Show the board after the first `step` steps of the game
+        self.seek_position(bisect.bisect_left(self._steps, step))
+
+    def seek_position(self, position):
+        position = max(0, min(position, len(self._steps)))
+        if abs(position - self.position) > self.checkpoint_interval:
+            # a position at the end of the last interval has no checkpoint of its own
+            checkpoint = min(position // self.checkpoint_interval, len(self._checkpoints) - 1)
+            self.types = array.array('b', self._checkpoints[checkpoint])
+            self.type_counts = [0] * len(self.labels)
+            for t in self.types:
+                self.type_counts[t] += 1
+            self.position = checkpoint * self.checkpoint_interval
+        while self.position < position:
+            self.forward()
+        while self.position > position:
+            self.backward()
+
+    def _set_type(self, node, t):
+        self.type_counts[self.types[node]] -= 1
+        self.type_counts[t] += 1
+        self.types[node] = t
+
+    def counter(self):
+        return Counter({label: self.type_counts[t] for t, label in enumerate(self.labels)})
+
+    def sync_graph(self):
+        nx.set_node_attributes(self.g, {v: self.labels[t] for v, t in enumerate(self.types)}, name="types")
+
+    def draw(self, node_pos=None, player_runtimes=None):
+        # draw_graph of the current board. Without player runtimes the legend shows the type labels.
+        self.sync_graph()
+        if node_pos is None:
+            if self._node_pos is None:
+                self._node_pos = nx.spring_layout(self.g)
+            node_pos = self._node_pos
+        if player_runtimes is None:
+            player_runtimes = dict()
+            for t, label in enumerate(self.labels):
+                player_runtime = PlayerRuntime()
+                player_runtime.player = Player()
+                player_runtime.player.name = label
+                player_runtime.player_id = t
+                player_runtime.player_type = label
+                player_runtimes[t] = player_runtime
+        draw_graph(self.g, node_pos, player_runtimes, self.counter())
+
+
+def evaluate_player_in_multiple_games(player_class, player_id, num_of_games, num_of_players, n, m, steps, seed,
+                                      engine='naive'):
     total_score_of_player = 0
     total_maximum_possible_score = 0
     assignment = [(0, 1), (1, 0)]
     for i in range(num_of_games):
         p = Parameters(num_of_players=num_of_players, n=n, m=m, steps=steps, assignment=assignment[i % 2],
                        seed=seed + int(i / 2),
-                       interactive=False)
+                       interactive=False, engine=engine)
         result, scores = run_moran_game(p, player_class)
         total_score_of_player += scores[player_id]
         total_maximum_possible_score += n
         print(result, scores)
     return total_score_of_player, total_maximum_possible_score
 
+def evaluate_player_sequentially(player_class, player_id, num_of_games, num_of_players, n, m, steps, seed,
+                                 threshold, error_rate=0.05, engine='naive'):
+    # Plays the games of evaluate_player_in_multiple_games pair by pair (both assignments of a seed) and stops
+    # as soon as the outcome is decided: either exactly (the threshold is reached or out of reach), or
+    # statistically, when a confidence interval of the mean score per game lies above or below
+    # threshold / num_of_games. The interval is the tighter of a Hoeffding and an empirical Bernstein bound
+    # over the pair scores, with a union bound over all stopping points, so the decision is wrong with
+    # probability at most error_rate.
+    # Returns (passed, score of the player, maximum possible score, number of games played).
+    total_score_of_player = 0
+    total_maximum_possible_score = 0
+    assignment = [(0, 1), (1, 0)]
+    target = 2 * threshold / num_of_games  # required mean score of a pair
+    pair_range = 2 * n
+    units = 0
+    pair_sum = 0
+    pair_sum_of_squares = 0
+    games = 0
+    for first in range(0, num_of_games, 2):
+        pair_score = 0
+        for i in range(first, min(first + 2, num_of_games)):
+            p = Parameters(num_of_players=num_of_players, n=n, m=m, steps=steps, assignment=assignment[i % 2],
+                           seed=seed + int(i / 2),
+                           interactive=False, engine=engine)
+            result, scores = run_moran_game(p, player_class)
+            total_score_of_player += scores[player_id]
+            total_maximum_possible_score += n
+            pair_score += scores[player_id]
+            games += 1
+            print(result, scores)
+
+        if total_score_of_player >= threshold:
+            return True, total_score_of_player, total_maximum_possible_score, games
+        if total_score_of_player + (num_of_games - games) * n < threshold:
+            return False, total_score_of_player, total_maximum_possible_score, games
+        if games % 2 == 1:
+            break
+
+        units += 1
+        pair_sum += pair_score
+        pair_sum_of_squares += pair_score ** 2
+        if units < 2:
+            continue
+        mean = pair_sum / units
+        variance = max(0.0, (pair_sum_of_squares - units * mean ** 2) / (units - 1))
+        a = math.log(8 * units * (units + 1) / error_rate)
+        hoeffding = pair_range * math.sqrt(a / (2 * units))
+        bernstein = math.sqrt(2 * variance * a / units) + 7 * pair_range * a / (3 * (units - 1))
+        error = min(hoeffding, bernstein)
+        if mean - error >= target:
+            return True, total_score_of_player, total_maximum_possible_score, games
+        if mean + error < target:
+            return False, total_score_of_player, total_maximum_possible_score, games
+
+    return total_score_of_player >= threshold, total_score_of_player, total_maximum_possible_score, games
+
+
+def check_player_sequentially(player_class, player_id, num_of_games, num_of_players, n, m, steps, seed,
+                              threshold, error_rate=0.05, engine='naive'):
+    # check_player with early stopping. Returns (True or the reason of the failure, number of games played).
+    passed, player_score, total, games = evaluate_player_sequentially(player_class, player_id, num_of_games,
+                                                                      num_of_players, n, m, steps, seed,
+                                                                      threshold, error_rate, engine)
+    if passed:
+        return True, games
+    return (f'The player scored {player_score} out of {total} points in {games} of {num_of_games} games and is '
+            f'not expected to score at least {threshold} points in all of them.'), games
+
+
+def _run_tournament_game(game):
+    # game: (game index, indices of the player classes, assignment, seed, parameters of the tournament)
+    index, matchup, assignment, seed, settings = game
+    global _tournament_pool
+    p = Parameters(num_of_players=len(matchup), n=settings['n'], m=settings['m'], steps=settings['steps'],
+                   seed=seed, assignment=assignment, interactive=False, engine=settings['engine'],
+                   move_timeout=settings['move_timeout'], game_timeout=settings['game_timeout'])
+    player_classes = [_tournament_classes[i] for i in matchup]
+    if _tournament_pool is None and (p.move_timeout is not None or p.game_timeout is not None):
+        _tournament_pool = PlayerProcessPool()
+    result, scores = run_moran_game(p, player_classes=player_classes, player_pool=_tournament_pool)
+    return {'game': index, 'players': [player_class.__name__ for player_class in player_classes],
+            'assignment': list(assignment), 'seed': seed, 'scores': [scores[i] for i in range(len(matchup))],
+            'result': result}
+
+
+# player classes of a tournament worker process, set once by the pool initializer
+_tournament_classes = None
+# PlayerProcessPool of a tournament worker process with time limits, started by its first game
+_tournament_pool = None
+
+
+def _init_tournament_worker(player_classes):
+    global _tournament_classes
+    _tournament_classes = player_classes
+
+
+def run_tournament(player_classes, num_of_games, n, m, steps, seed, num_of_players=2, workers=None,
+                   output=None, engine='naive', move_timeout=None, game_timeout=None):
+    # Round robin: every combination of num_of_players classes plays num_of_games boards, each of them once
+    # for every assignment permutation, so that the seat advantage cancels out (as in
+    # evaluate_player_in_multiple_games). The seed of every board is drawn from seed up front, so the results
+    # do not depend on the number of workers. Per-game results are written to the JSONL file output as they
+    # arrive (in game order). With move_timeout or game_timeout (seconds), the players run in worker
+    # processes with these limits. The class names must be distinct.
+    # Returns {class name: (score, maximum possible score)}, the arguments of check_player.
+    global _tournament_classes, _tournament_pool
+    names = [player_class.__name__ for player_class in player_classes]
+    if len(set(names)) != len(names):
+        raise ValueError(f'The player classes of a tournament need distinct names: {names}')
+    rng = random.Random(seed)
+    settings = {'n': n, 'm': m, 'steps': steps, 'engine': engine, 'move_timeout': move_timeout,
+                'game_timeout': game_timeout}
+    games = []
+    for matchup in itertools.combinations(range(len(player_classes)), num_of_players):
+        for _ in range(num_of_games):
+            game_seed = rng.randint(0, 2 ** 31 - 1)
+            for assignment in itertools.permutations(range(num_of_players)):
+                games.append((len(games), matchup, assignment, game_seed, settings))
+
+    totals = {name: [0, 0] for name in names}
+
+    def collect(results):
+        with open(output, 'w') if output else contextlib.nullcontext() as f:
+            for game_result in results:
+                if f is not None:
+                    f.write(json.dumps(game_result) + '\n')
+                    f.flush()
+                for name, score in zip(game_result['players'], game_result['scores']):
+                    totals[name][0] += score
+                    totals[name][1] += n
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1:
+        _tournament_classes = player_classes
+        try:
+            collect(map(_run_tournament_game, games))
+        finally:
+            _tournament_classes = None
+            if _tournament_pool is not None:
+                _tournament_pool.close()
+                _tournament_pool = None
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_tournament_worker,
+                                                    initargs=(player_classes,)) as executor:
+            collect(executor.map(_run_tournament_game, games, chunksize=max(1, len(games) // (8 * workers))))
+
+    return {name: (score, total) for name, (score, total) in totals.items()}
+
+
 def check_player(player_score, total, threshold):
     if player_score >= threshold:
         return True
@@ -0,0 +1,93 @@
+import random
+
+import numpy as np
+import pytest
+
+from maxcut_single import (as_csr, batch_cut_values, check_cut_value, coarsen, create_sparse_weighted_graph,
+                           create_weighted_graph, local_search_maxcut, local_search_maxcut_to_optimum, side_matrix)
+
+# (n, p, seed, A, B) of local_search_maxcut from the first half / second half partition, as returned by the
+# networkx implementation before the incremental gain table
+BASELINE_LOCAL_SEARCH = [
+    (12, 0.5, 0, [0, 1, 2, 4, 5, 6, 11],
+     [7, 8, 9, 10, 3]),
+    (12, 0.5, 1, [0, 2, 4, 5, 7, 11],
+     [6, 8, 9, 10, 1, 3]),
+    (30, 0.2, 2, [0, 1, 3, 5, 6, 7, 9, 10, 11, 13, 14, 27, 17, 18],
+     [15, 16, 19, 20, 21, 22, 23, 24, 25, 26, 28, 29, 2, 8, 12, 4]),
+    (60, 0.1, 3, [0, 1, 2, 3, 5, 6, 7, 9, 10, 11, 13, 16, 17, 18, 19, 20, 21, 22, 23, 24, 25, 26, 27, 28, 29, 30,
+                  33, 41, 47, 50],
+     [31, 32, 34, 35, 36, 37, 38, 40, 42, 43, 44, 45, 46, 48, 49, 51, 52, 53, 54, 55, 56, 57, 58, 59, 15, 12, 14, 8,
+      4, 39]),
+]
+
+
+def halves(n):
+    return list(range(n // 2)), list(range(n // 2, n))
+
+
+def flip_gains(graph, side):
+    # gain of flipping every node: the weight to its own side minus the weight to the other side
+    u, v, w = graph.edges()
+    same = np.where(side[u] == side[v], w, -w)
+    n = graph.number_of_nodes()
+    return np.bincount(u, weights=same, minlength=n) + np.bincount(v, weights=same, minlength=n)
+
+
+@pytest.mark.parametrize('n, p, seed, A, B', BASELINE_LOCAL_SEARCH)
+def test_local_search_matches_the_baseline(n, p, seed, A, B):
+    G = create_weighted_graph(n, p, 10, seed=seed)
+    assert local_search_maxcut(G, *halves(n), seed) == (A, B)
+    assert local_search_maxcut(as_csr(G), *halves(n), seed) == (A, B)
+
+
+@pytest.mark.parametrize('graph', [create_weighted_graph(80, 0.2, 10, seed=4),
+                                   create_sparse_weighted_graph(3000, 0.002, 10, seed=5)])
+def test_local_search_to_optimum_stops_at_a_local_optimum(graph):
+    n = graph.number_of_nodes()
+    A, B, info = local_search_maxcut_to_optimum(graph, *halves(n), seed=6)
+    csr = as_csr(graph)
+    side = np.ones(n, dtype=np.int8)
+    side[csr.membership(A)] = 0
+    assert sorted(A + B) == list(range(n))
+    assert info['flips'] > 0
+    assert flip_gains(csr, side).max() <= 0
+
+
+def test_coarse_cut_differs_from_the_projected_cut_by_a_constant():
+    graph = create_sparse_weighted_graph(2000, 0.003, 10, seed=7)
+    levels = [graph]
+    maps = []
+    # the second level coarsens a graph with negative weights
+    for level in range(2):
+        coarse, coarse_of, flip = coarsen(levels[-1], seed=8 + level)
+        assert coarse.number_of_nodes() < levels[-1].number_of_nodes()
+        levels.append(coarse)
+        maps.append((coarse_of, flip))
+
+    rng = np.random.default_rng(9)
+    for level, (coarse_of, flip) in enumerate(maps):
+        fine, coarse = levels[level], levels[level + 1]
+        differences = set()
+        for _ in range(10):
+            coarse_side = rng.integers(0, 2, coarse.number_of_nodes()).astype(np.int8)
+            differences.add(fine.cut_value(coarse_side[coarse_of] ^ flip) - coarse.cut_value(coarse_side))
+        assert len(differences) == 1
+
+
+@pytest.mark.parametrize('graph', [create_weighted_graph(50, 0.3, 10, seed=10),
+                                   create_sparse_weighted_graph(1003, 0.01, 10, seed=11)])
+def test_batch_cut_values_match_check_cut_value(graph):
+    n = graph.number_of_nodes()
+    rng = random.Random(12)
+    partitions = [[v for v in range(n) if rng.random() < 0.5] for _ in range(7)]
+    sides = side_matrix(graph, partitions)
+    cut_values = batch_cut_values(graph, sides)
+    assert cut_values.tolist() == batch_cut_values(graph, np.packbits(sides, axis=1), packed=True).tolist()
+    # small blocks, so that the edges are split over several of them
+    assert cut_values.tolist() == batch_cut_values(graph, sides, max_block=64).tolist()
+    for A, cut_value in zip(partitions, cut_values.tolist()):
+        in_A = set(A)
+        B = [v for v in range(n) if v not in in_A]
+        assert check_cut_value(graph, A, B, cut_value) == 'True'
+        assert check_cut_value(graph, A, B, cut_value + 1) != 'True'
@@ -0,0 +1,168 @@
+import collections
+import json
+import os
+import stat
+import time
+
+import pytest
+
+from moran_game_single import (GameHistory, GameReplay, GameStats, Parameters, PlayerOne, PlayerProcessPool,
+                               PlayerThree, PlayerTwo, run_moran_game, run_tournament)
+
+
+class HistoryCheckingPlayer(PlayerOne):
+    # Checks that the history mirror of its worker has no gaps, and is slow every few moves
+    calls = 0
+
+    def move(self, node) -> int:
+        history = self.game_info.history
+        if len(history) > 0:
+            assert history[-1].step == len(history) - 1, \
+                f'last recorded step {history[-1].step} but only {len(history)} moves mirrored'
+        HistoryCheckingPlayer.calls += 1
+        if HistoryCheckingPlayer.calls % 7 == 0:
+            time.sleep(0.08)
+        return super().move(node)
+
+
+class GraphCachingPlayer(PlayerOne):
+    # Legacy player that keeps the graph of initialize and reads the types from its node attributes
+    def initialize(self, game_info, player_id, my_type, player_seed) -> None:
+        super().initialize(game_info, player_id, my_type, player_seed)
+        self.g = game_info.g
+
+    def move(self, node) -> int:
+        for v in self.g.nodes:
+            assert self.g.nodes[v]['types'] == self.game_info.type_of(v), f'stale type of node {v}'
+        for v in self.g.adj[node]:
+            if self.g.nodes[v]['types'] != self.g.nodes[node]['types']:
+                return v
+        return None
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_cached_graph_keeps_the_current_types(seed):
+    p = Parameters(num_of_players=2, n=30, m=2, steps=300, seed=seed, assignment=[0, 1], interactive=False)
+    local = run_moran_game(p, GraphCachingPlayer)
+    with PlayerProcessPool() as pool:
+        assert run_moran_game(p, GraphCachingPlayer, player_pool=pool) == local
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def test_remote_history_has_no_gaps_after_timeouts(seed):
+    p = Parameters(num_of_players=2, n=30, m=2, steps=150, seed=seed, assignment=[0, 1], interactive=False,
+                   move_timeout=0.05)
+    with PlayerProcessPool() as pool:
+        result, scores = run_moran_game(p, player_classes=[HistoryCheckingPlayer, HistoryCheckingPlayer],
+                                        player_pool=pool)
+    assert 'Timeouts' in result
+    assert sum(scores.values()) == 30
+
+
+def test_remote_history_has_no_gaps_after_game_budget():
+    p = Parameters(num_of_players=2, n=30, m=2, steps=150, seed=4, assignment=[0, 1], interactive=False,
+                   move_timeout=0.05, game_timeout=0.1)
+    result, scores = run_moran_game(p, player_classes=[HistoryCheckingPlayer, HistoryCheckingPlayer])
+    assert sum(scores.values()) == 30
+
+
+def test_remote_players_play_the_same_game():
+    p = Parameters(num_of_players=2, n=30, m=2, steps=300, seed=5, assignment=[1, 0], interactive=False)
+    with PlayerProcessPool() as pool:
+        assert run_moran_game(p, player_pool=pool) == run_moran_game(p)
+
+
+def replay_game(seed, history='full', history_size=None):
+    p = Parameters(num_of_players=2, n=60, m=2, steps=3000, seed=seed, assignment=[0, 1], interactive=False,
+                   history=history, history_size=history_size)
+    game = {}
+
+    class Recorder(PlayerOne):
+        def initialize(self, game_info, player_id, my_type, player_seed) -> None:
+            super().initialize(game_info, player_id, my_type, player_seed)
+            game['info'] = game_info
+
+    result, scores = run_moran_game(p, Recorder)
+    return p, game['info'], scores
+
+
+def test_replay_seeks_to_the_end_when_the_takeovers_fill_the_checkpoints():
+    p, game_info, scores = replay_game(6)
+    takeovers = len(GameReplay.from_parameters(p, game_info.history))
+    assert takeovers > 2
+    for interval in (takeovers, takeovers // 2 if takeovers % 2 == 0 else takeovers, 1):
+        replay = GameReplay.from_parameters(p, game_info.history, checkpoint_interval=interval)
+        replay.seek_position(len(replay))
+        assert list(replay.types) == list(game_info.types)
+        replay.seek_position(0)
+        replay.seek_position(len(replay))
+        assert list(replay.types) == list(game_info.types)
+
+
+@pytest.mark.parametrize('history, history_size', [('ring', 10), ('none', None)])
+def test_replay_rejects_incomplete_histories(history, history_size):
+    p, game_info, scores = replay_game(6, history, history_size)
+    with pytest.raises(ValueError):
+        GameReplay.from_parameters(p, game_info.history)
+
+
+def test_unknown_engines_are_rejected():
+    p = Parameters(num_of_players=2, n=30, m=2, steps=100, seed=7, assignment=[0, 1], interactive=False,
+                   engine='events')
+    with pytest.raises(ValueError):
+        run_moran_game(p)
+
+
+@pytest.mark.parametrize('steps', [50, None])
+def test_engines_agree_on_a_fixated_start(steps):
+    results = []
+    for engine in ('naive', 'event'):
+        p = Parameters(num_of_players=1, n=30, m=2, steps=steps, seed=8, assignment=[0], interactive=False,
+                       engine=engine)
+        stats = GameStats()
+        results.append((run_moran_game(p, stats=stats), stats.steps))
+    assert results[0] == results[1]
+    assert results[1][1] == 1
+
+
+def test_event_engine_plays_one_step_without_steps():
+    p = Parameters(num_of_players=2, n=30, m=2, steps=0, seed=8, assignment=[0, 1], interactive=False,
+                   engine='event')
+    stats = GameStats()
+    run_moran_game(p, stats=stats)
+    assert stats.steps == 1
+
+
+def test_tournament_plays_every_board_in_all_seats(tmp_path):
+    output = tmp_path / 'games.jsonl'
+    totals = run_tournament([PlayerOne, PlayerTwo, PlayerThree], 2, 30, 2, 200, seed=9, workers=1,
+                            output=str(output))
+    games = [json.loads(line) for line in output.read_text().splitlines()]
+    assert len(games) == 3 * 2 * 2
+    seats = collections.defaultdict(set)
+    for game in games:
+        seats[tuple(game['players']), game['seed']].add(tuple(game['assignment']))
+    assert all(assignments == {(0, 1), (1, 0)} for assignments in seats.values())
+    assert sum(score for score, total in totals.values()) == 30 * len(games)
+
+
+def test_tournament_rejects_classes_with_the_same_name():
+    other = type('PlayerOne', (PlayerTwo,), {})
+    with pytest.raises(ValueError):
+        run_tournament([PlayerOne, other], 1, 30, 2, 100, seed=9, workers=1)
+
+
+def test_spilled_history_loads_from_a_read_only_file(tmp_path):
+    path = tmp_path / 'history.bin'
+    history = GameHistory(['A', 'B'], spill=str(path), chunk_size=4)
+    for step in range(10):
+        history.record(step, step % 2, step, step + 1 if step % 3 else -1, 1 - step % 2)
+    moves = list(history)
+    history.close()
+    os.chmod(path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+    loaded = GameHistory.load(str(path), ['A', 'B'])
+    assert list(loaded) == moves
+    assert loaded[-1] == moves[-1]
+    # the sandbox may run as root, which can open read-only files for writing
+    assert loaded._file.mode == 'rb'
+    loaded.close()